@@ -2,43 +2,57 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 import os
-from PIL import Image
+import uuid
 
-from utils.pdf_generator import generate_pdf
-from utils.data_handling import upload_and_process_stock_data
+from utils.catalog_store import CATALOG_COLUMNS, ingest_stock_upload
+from utils.invoice_model import InvoiceModel, LineItem
+from utils.invoice_store import get_invoice_store
+from utils.data_handling import load_stock_frame, stock_file_digest, upload_and_process_stock_data
+from utils.logo_cache import load_logo
+from utils.pdf_generator import generate_pdf_bytes
+from utils.search_index import SearchIndex
+from utils.shared_catalog import get_catalog_registry
+from utils.stock_index import StockIndex
+from utils.stock_validation import format_validation_report
 
 
 st.set_page_config(
     page_title="Product Management",
     layout="wide"  # Options: "centered", "wide"
 )
-# Initialize session state for clients and products
-if "clients" not in st.session_state:
-    st.session_state.clients = {}
-
+# Initialize session state for products (clients live in the invoice store)
 if "products" not in st.session_state:
-    st.session_state.products = []
+    st.session_state.products = InvoiceModel()  # Line items with running totals
+
+
+# Stock columns covered by the product search box
+SEARCH_COLUMNS = ['description', 'model_name', 'manufacturer', 'code', 'color']
 
+if 'store_owner' not in st.session_state:
+    st.session_state.store_owner = uuid.uuid4().hex  # Marks the invoices this session saved in the store
 
-if 'edit_mode' not in st.session_state:
-    st.session_state.edit_mode = None  # Tracks which product is being edited
+if 'summary_editor_version' not in st.session_state:
+    st.session_state.summary_editor_version = 0  # Bumped after each grid edit to redraw the summary
+
+# Invoice lines shown per page of the summary grid
+SUMMARY_PAGE_SIZE = 25
 
 def save_client(name, contact):
-    """Saves a client to the session state."""
+    """Saves a client to the persistent invoice store."""
     if not name or not contact:
         st.error("Client name and contact information are required.")
         return False
-    st.session_state.clients[name] = contact
+    get_invoice_store().save_client(name, contact)
     st.success(f"Client '{name}' saved.", icon="✅")
     return True
 
 def get_client_info(name):
-    """Retrieves client information based on name."""
-    return st.session_state.clients.get(name, ("", ""))
+    """Retrieves client contact information based on name ("" if unknown)."""
+    return get_invoice_store().get_client(name) or ""
 
-def get_client_names():
-    """Returns a list of client names."""
-    return list(st.session_state.clients.keys())
+def get_client_names(prefix=""):
+    """Returns the stored client names starting with `prefix` (typeahead, limited)."""
+    return get_invoice_store().client_names(prefix)
 
 
 def add_product(description, quantity, unit_price, sub_items=None):
@@ -61,25 +75,18 @@ def add_product(description, quantity, unit_price, sub_items=None):
         st.error("Unit price cannot be negative.")
         return False
 
-    total = quantity * unit_price
-    new_product = {
-        "Description": description.strip(),
-        "Quantity": quantity,
-        "Unit Price": unit_price,
-        "Total": total,
-        "Sub-items": sub_items if sub_items else []
-    }
+    new_product = LineItem(description.strip(), quantity, unit_price, sub_items)
 
-    # Add the new product to the session state
+    # Add the new product to the session state, which keeps the running totals
     if "products" not in st.session_state:
-        st.session_state.products = []
+        st.session_state.products = InvoiceModel()
 
     st.session_state.products.append(new_product)
     return True
 
 def calculate_subtotal():
-    """Calculates the subtotal of products in the invoice."""
-    return sum(product['Total'] for product in st.session_state.products)
+    """Returns the running subtotal of the products in the invoice."""
+    return st.session_state.products.subtotal
 
 # --- Streamlit Components/Sections ---
 def display_invoice_customization():
@@ -95,11 +102,21 @@ def display_invoice_customization():
         if os.path.exists(default_logo_path):
             company_logo = default_logo_path
     
-    # Display the logo
+    # Decode the logo once per distinct content and display it
+    if company_logo:
+        try:
+            company_logo = load_logo(company_logo)
+        except Exception as e:
+            st.sidebar.error(f"Could not read the logo: {e}")
+            company_logo = None
     if company_logo:
-        st.sidebar.image(Image.open(company_logo), caption="Company Logo", use_column_width=True)
+        st.sidebar.image(company_logo, caption="Company Logo", use_column_width=True)
     
-    invoice_id = st.sidebar.text_input("Invoice ID", f"INV-{datetime.now().strftime('%Y%m%d%H%M')}")
+    # Drawn from the store's sequence once per invoice, so sessions never share an ID
+    if 'invoice_id' not in st.session_state:
+        st.session_state.invoice_id = get_invoice_store().allocate_invoice_id()
+    invoice_id = st.sidebar.text_input("Invoice ID", key="invoice_id")
+    st.sidebar.button("New Invoice ID", on_click=new_invoice_id)
     invoice_date = st.sidebar.date_input("Invoice Date", datetime.now().date())
     due_date = st.sidebar.date_input("Due Date", datetime.now().date())
     
@@ -107,6 +124,11 @@ def display_invoice_customization():
 
 
 
+def new_invoice_id():
+    """Allocates the next invoice ID for this session (runs before the widgets are redrawn)."""
+    st.session_state.invoice_id = get_invoice_store().allocate_invoice_id()
+
+
 def display_client_information():
     """Sidebar for managing client information."""
     st.sidebar.header("Client Information")
@@ -116,8 +138,10 @@ def display_client_information():
     if st.sidebar.button("Save Client"):
         save_client(client_name, client_contact)
 
-    if get_client_names():
-        selected_client = st.sidebar.selectbox("Select Existing Client", [""] + get_client_names())
+    # Typeahead: the names typed so far narrow the stored clients
+    client_names = get_client_names(client_name)
+    if client_names:
+        selected_client = st.sidebar.selectbox("Select Existing Client", [""] + client_names)
         if selected_client:
             client_name, client_contact = selected_client, get_client_info(selected_client)
             st.sidebar.write(f"Loaded client info: **{client_name}**, **{client_contact}**")
@@ -127,29 +151,45 @@ def display_client_information():
 
 def load_data(uploaded_file):
     try:
-        # Get the file extension using the name attribute
-        file_extension = uploaded_file.name.split('.')[-1]  # Get the file extension
-
-        if file_extension == 'csv':
-            df = pd.read_csv(uploaded_file)
-        elif file_extension in ['xls', 'xlsx']:
-            df = pd.read_excel(uploaded_file)
-        else:
-            st.error("Unsupported file format. Please upload a CSV or Excel file.")
-            return None
-        
-        df = df.fillna("<Missing>")  # Convert NaN to a unique placeholder
-        return df
+        # Parsed once per distinct file content, then served from the cache on reruns
+        return load_stock_frame(uploaded_file)
     except Exception as e:
         st.error(f"Error loading file: {e}")
         return None
 
 def apply_filters(df, filters):
-    filtered_df = df.copy()
-    for col, selected_values in filters.items():
-        if "All" not in selected_values:
-            filtered_df = filtered_df[filtered_df[col].isin(selected_values)]
-    return filtered_df
+    """Filters the stock DataFrame through its bitmap index."""
+    return get_stock_index(df).filter(df, filters)
+
+
+def get_stock_index(df):
+    """Returns the filter index of the current stock data, building it once per catalog."""
+    return _cached_for_catalog('stock_index', df, StockIndex)
+
+
+def get_search_index(df):
+    """Returns the full-text search index of the current stock data, building it once per catalog."""
+    return _cached_for_catalog('stock_search_index', df, lambda df: SearchIndex.from_frame(df, SEARCH_COLUMNS))
+
+
+def _cached_for_catalog(name, df, build):
+    """Returns `build(df)`, built once per shared catalog or kept in the session state for direct reads."""
+    handle = st.session_state.get('catalog_handle')
+    if handle is not None and handle.frame is df:
+        return handle.catalog.resource(name, build)
+
+    key = (st.session_state.get('stock_catalog_key'), tuple(df.columns), len(df))
+    cached = st.session_state.get(name)
+    if cached is None or cached[0] != key:
+        cached = (key, build(df))
+        st.session_state[name] = cached
+    return cached[1]
+
+
+def clear_filters(columns):
+    """Resets every stock filter widget to "All" (runs before the widgets are redrawn)."""
+    for col in columns:
+        st.session_state[f"filter_{col}"] = ["All"]
 
 
 def display_and_manage_products():
@@ -170,17 +210,86 @@ def display_and_manage_products():
 
 
 def display_sidebar():
-    """Handles stock data integration via file upload."""
+    """Handles stock data integration via file upload or the shared catalog."""
     st.sidebar.header("Stock Data Integration")
     uploaded_file = st.sidebar.file_uploader("Upload Stock Data (CSV or Excel)", type=["csv", "xls", "xlsx"])
+    registry = get_catalog_registry()
 
     if uploaded_file:
-        with st.spinner("Processing stock data..."):
+        digest = stock_file_digest(uploaded_file)
+        try:
+            # Streamed into a columnar catalog once per distinct file, then shared by every session using it
+            combined_df = use_shared_catalog(digest, lambda: registry.open(ingest_with_progress(uploaded_file), digest, CATALOG_COLUMNS))
+        except Exception as e:
+            release_shared_catalog()
+            st.session_state['stock_catalog_key'] = digest
+            st.warning(f"Could not build the columnar catalog ({e}); reading the file directly.")
             return load_data(uploaded_file)
-    
+        st.sidebar.button(
+            "📢 Publish as Shared Catalog",
+            on_click=publish_catalog,
+            args=(digest,),
+            help="Make this file the stock catalog of every session without its own upload.",
+        )
+        return combined_df
+
+    published = registry.current_version()
+    if published:
+        st.sidebar.caption(f"Using shared catalog v{published['version']} (published {published['published_at']:%Y-%m-%d %H:%M})")
+        return use_shared_catalog(published['digest'], registry.current)
+
+    release_shared_catalog()
     return None
 
 
+def ingest_with_progress(uploaded_file):
+    """Converts an upload to a columnar catalog behind a progress bar and returns the catalog path."""
+    progress_bar = st.sidebar.progress(0.0, text="Processing stock data...")
+    try:
+        catalog, report = ingest_stock_upload(
+            uploaded_file,
+            progress=lambda fraction: progress_bar.progress(fraction, text=f"Processing stock data... {fraction:.0%}"),
+        )
+    finally:
+        progress_bar.empty()
+    summary = format_validation_report(report) if report else None
+    if summary:
+        st.sidebar.warning(summary)
+    return catalog
+
+
+def use_shared_catalog(digest, open_handle):
+    """Returns the shared stock DataFrame for `digest`, swapping the session's catalog handle if needed.
+
+    Args:
+        digest (str): Content hash of the wanted catalog.
+        open_handle (callable): Returns a new `CatalogHandle` when the session holds none for `digest`.
+
+    Returns:
+        pd.DataFrame: The shared, read-only stock data.
+    """
+    handle = st.session_state.get('catalog_handle')
+    if handle is None or handle.digest != digest:
+        release_shared_catalog()
+        handle = open_handle()
+        st.session_state['catalog_handle'] = handle
+    st.session_state['stock_catalog_key'] = handle.digest
+    return handle.frame
+
+
+def release_shared_catalog():
+    """Drops the session's reference to its shared catalog, if any."""
+    handle = st.session_state.pop('catalog_handle', None)
+    if handle is not None:
+        handle.release()
+
+
+def publish_catalog(digest):
+    """Publishes the session's catalog as the current version for every session."""
+    version = get_catalog_registry().publish(digest)
+    st.toast(f"Published shared catalog v{version}.")
+
+
 def display_product_entry_section(combined_df):
     """Displays the interface for adding new products manually or from stock."""
     st.subheader("🆕 Add New Product")
@@ -209,13 +318,35 @@ def display_stock_product_entry(combined_df):
         st.warning("⚠️ Please upload stock data first.")
         return
     
-    filters = {col: st.multiselect(f"Filter by {col}", ["All"] + sorted(combined_df[col].astype(str).unique()), default=["All"]) for col in combined_df.columns}
+    index = get_stock_index(combined_df)
+
+    # Facet counts come from the selections of the previous run, cross-filtered per column
+    current_filters = {}
+    for col in combined_df.columns:
+        known = set(index.values(col))
+        selected = [value for value in st.session_state.get(f"filter_{col}", ["All"]) if value == "All" or value in known]
+        st.session_state[f"filter_{col}"] = current_filters[col] = selected
+    counts = index.facet_counts(current_filters)
+
+    filters = {}
+    for col in combined_df.columns:
+        selected = current_filters[col]
+        options = ["All"] + [value for value in index.values(col) if counts[col][value] or value in selected]
+        filters[col] = st.multiselect(
+            f"Filter by {col}", options, key=f"filter_{col}",
+            format_func=lambda value, col=col: value if value == "All" else f"{value} ({counts[col][value]})",
+        )
 
-    if st.button("Clear Filters"):
-        for col in filters.keys():
-            st.session_state[f"filter_{col}"] = ["All"]
+    st.button("Clear Filters", on_click=clear_filters, args=(list(combined_df.columns),))
 
-    filtered_product = apply_filters(combined_df, filters)
+    search_query = st.text_input("Search products", placeholder="Arabic or English, e.g. كرسي or sofa")
+    if search_query:
+        # Ranked search results, restricted to the rows passing the filters
+        mask = index.mask(filters)
+        ranked_rows = [row for row in get_search_index(combined_df).search(search_query) if mask[row]]
+        filtered_product = combined_df.iloc[ranked_rows]
+    else:
+        filtered_product = apply_filters(combined_df, filters)
 
     if not filtered_product.empty:
         st.subheader("Filtered Products")
@@ -256,14 +387,6 @@ def display_stock_product_entry(combined_df):
 
 
 
-def delete_product(index):
-    """Deletes a product from the invoice."""
-    if 0 <= index < len(st.session_state.products):
-        del st.session_state.products[index]
-        st.success("Product deleted.", icon="❌")
-    else:
-        st.error("Invalid product index.")
-
 # def edit_product(index):
 #     """Function to edit the selected product."""
 #     # Check if products exist in session state
@@ -403,173 +526,138 @@ def delete_product(index):
 
 
 
-def edit_product(index):
-    """Function to edit a selected product."""
-    st.session_state.edit_mode = index
-    st.session_state.temp_edit = st.session_state.products[index].copy()
-
-    st.write("### Edit Product")
-
-    temp_product = st.session_state.temp_edit
-
-    # Append index to each key for uniqueness
-    temp_product['Description'] = st.text_input(
-        "Description", value=temp_product['Description'], key=f'edit_description_{index}'
-    )
-    temp_product['Quantity'] = st.number_input(
-        "Quantity", value=temp_product['Quantity'], min_value=1, key=f'edit_quantity_{index}'
-    )
-    temp_product['Unit Price'] = st.number_input(
-        "Unit Price", value=temp_product['Unit Price'], min_value=0.0, step=0.01, key=f'edit_price_{index}'
-    )
-    temp_product['Total'] = temp_product['Quantity'] * temp_product['Unit Price']
-
-    with st.expander("Edit Sub-items"):
-        for i, sub_item in enumerate(temp_product['Sub-items']):
-            temp_product['Sub-items'][i] = st.text_input(
-                f"Sub-item {i + 1}", value=sub_item, key=f'edit_sub_item_{index}_{i}'
-            )
-        new_sub_item = st.text_input("New Sub-item", key=f'edit_new_sub_item_{index}')
-        if new_sub_item.strip():
-            temp_product['Sub-items'].append(new_sub_item.strip())
-
-    if st.button("Save", key=f'save_edit_{index}'):
-        save_edit(index)
-    if st.button("Cancel", key=f'cancel_edit_{index}'):
-        cancel_edit()
-
-
-
-def save_edit(index):
-    """Saves the edited product back to the main list."""
-    st.session_state.products[index] = st.session_state.temp_edit
-    st.session_state.edit_mode = None
-    st.success("Product updated successfully!")
-
-
-def cancel_edit():
-    """Closes the modal without saving changes."""
-    st.session_state.edit_mode = None
-    st.info("Edit canceled.")
-
-
-st.title("Product Management")
-
-# Display products with an edit button
-for i, product in enumerate(st.session_state.products):
-    st.write(f"**Product {i + 1}:** {product['Description']}")
-    st.write(f"Quantity: {product['Quantity']}, Unit Price: ${product['Unit Price']:.2f}")
-    st.write(f"Total: ${product['Total']:.2f}")
-    st.write(f"Sub-items: {', '.join(product['Sub-items'])}")
-    st.button("Edit", key=f"edit_button_{i}", on_click=edit_product, args=(i,))
-
-# Show the edit form if a product is being edited
-if st.session_state.edit_mode is not None:
-    edit_product(st.session_state.edit_mode)
-
-
-
-
 def display_invoice_summary():
-    """Displays the list of added products and the invoice summary with debugging."""
+    """Displays the invoice lines one page at a time in an editable grid, with the full-invoice subtotal."""
     st.subheader("Invoice Summary")
 
-    products = st.session_state.get("products", [])
+    invoice = st.session_state.products
+    if not invoice:
+        st.info("No products added yet. Start adding products.")
+        return
 
-    subtotal = calculate_subtotal()
+    page_count = -(-len(invoice) // SUMMARY_PAGE_SIZE)
+    page = st.number_input("Page", min_value=1, max_value=page_count, key="summary_page")
+    start = (page - 1) * SUMMARY_PAGE_SIZE
+    end = min(start + SUMMARY_PAGE_SIZE, len(invoice))
+    st.caption(f"Lines {start + 1}–{end} of {len(invoice)}")
+
+    # Only the visible lines are turned into grid rows
+    rows = pd.DataFrame(
+        [
+            {
+                "Description": product.description,
+                "Quantity": product.quantity,
+                "Unit Price": float(product.unit_price),
+                "Total": float(product.total),
+                "Sub-items": "; ".join(product.sub_items),
+            }
+            for product in (invoice[i] for i in range(start, end))
+        ],
+        index=range(start + 1, end + 1),
+    )
+    editor_key = f"summary_editor_{st.session_state.summary_editor_version}"
+    st.data_editor(
+        rows,
+        key=editor_key,
+        num_rows="delete",
+        disabled=["Total"],
+        width="stretch",
+        column_config={
+            "Quantity": st.column_config.NumberColumn(min_value=1, step=1),
+            "Unit Price": st.column_config.NumberColumn(min_value=0.0, step=0.01, format="$%.2f"),
+            "Total": st.column_config.NumberColumn(format="$%.2f"),
+            "Sub-items": st.column_config.TextColumn(help="Separate sub-items with ';'"),
+        },
+        on_change=apply_summary_edits,
+        args=(editor_key, start),
+    )
 
-    if products:
-        for idx, product in enumerate(products):
-            col1, col2 = st.columns([4, 1])
-            try:
-                col1.write(f"{product['Description']} (Qty: {product['Quantity']}, Price: ${product['Unit Price']:.2f})")
+    st.metric("Subtotal", f"${invoice.subtotal:.2f}")
 
-                # Displaying sub-items if they exist
-                if product['Sub-items']:
-                    sub_items_str = ', '.join(product['Sub-items'])
-                    col1.write(f"Sub-items: {sub_items_str}")
 
-            except KeyError as e:
-                st.error(f"Error displaying product: Missing key '{e}'. Please check your product data. Product: {product}") # More informative error
-                continue
+def apply_summary_edits(editor_key, start):
+    """Applies the grid's edits and deletions to the invoice model (runs before the rerun draws it)."""
+    invoice = st.session_state.products
+    changes = st.session_state[editor_key]
 
-            if col2.button("Edit", key=f"edit_{idx}"):
-                try:
-                    edit_product(idx)
-                except Exception as e:
-                    st.error(f"Error editing product: {e}")
+    for row, edits in changes.get("edited_rows", {}).items():
+        index = start + int(row)
+        product = invoice[index].to_dict()
+        if "Description" in edits and str(edits["Description"] or "").strip():
+            product["Description"] = str(edits["Description"]).strip()
+        if edits.get("Quantity") is not None:
+            product["Quantity"] = max(int(edits["Quantity"]), 1)
+        if edits.get("Unit Price") is not None:
+            product["Unit Price"] = max(edits["Unit Price"], 0)
+        if "Sub-items" in edits:
+            product["Sub-items"] = [item.strip() for item in str(edits["Sub-items"] or "").split(";") if item.strip()]
+        invoice[index] = product
 
+    # Delete from the bottom up so earlier positions stay valid
+    for row in sorted(changes.get("deleted_rows", []), reverse=True):
+        del invoice[start + int(row)]
 
-            if col2.button("Delete", key=f"delete_{idx}"):
-                delete_product(idx)
+    # A fresh grid key makes the next run draw the updated lines instead of replaying these edits
+    st.session_state.summary_editor_version += 1
+    page_count = max(-(-len(invoice) // SUMMARY_PAGE_SIZE), 1)
+    st.session_state.summary_page = min(st.session_state.get("summary_page", 1), page_count)
 
 
-        st.metric("Subtotal", f"${subtotal:.2f}")
-    else:
-        st.info("No products added yet. Start adding products.")
+def generate_and_download_pdf(invoice_id, company_name, logo, invoice_date, due_date, client_name, client_contact, products, subtotal, discount_amount, total):
+    """Generates and provides a download link for the PDF invoice.
 
-def generate_and_download_pdf(invoice_id, company_name, logo_path, invoice_date, due_date, client_name, client_contact, products, subtotal, discount_amount, total):
-    """Generates and provides a download link for the PDF invoice."""
+    `logo` is the decoded image returned by `load_logo`, or None.
+    """
     if not products:
         st.error("Please add at least one product before generating an invoice.")
         return
 
-    temp_logo_path = None  # Initialize
-
     try:
-        # Handle logo upload or default logo path
-        if logo_path is not None and hasattr(logo_path, 'type'):
-            temp_logo_path = f"temp_logo.{logo_path.type.split('/')[1]}"
-            with open(temp_logo_path, "wb") as f:
-                f.write(logo_path.getbuffer())
-        elif isinstance(logo_path, str) and os.path.exists(logo_path):
-            temp_logo_path = logo_path  # Use existing logo path if provided
-
-        # Generate PDF
-        pdf_file = generate_pdf(
-            invoice_id, company_name, temp_logo_path, invoice_date, due_date,
+        # Generate PDF in memory
+        pdf_bytes = generate_pdf_bytes(
+            invoice_id, company_name, logo, invoice_date, due_date,
             client_name, client_contact, products, subtotal, discount_amount, total
         )
+        if pdf_bytes is None:
+            return
+
+        # Keep a record of the issued invoice and its lines; IDs issued by other sessions are never overwritten
+        try:
+            get_invoice_store().save_invoice(
+                invoice_id, company_name, invoice_date, due_date, client_name, client_contact, products,
+                owner=st.session_state.store_owner,
+            )
+        except ValueError as e:
+            st.error(str(e), icon="⚠️")
+            return
 
         # Provide download link
-        with open(pdf_file, "rb") as file:
-            st.download_button("Download Invoice PDF", data=file, file_name=pdf_file, mime="application/pdf")
+        st.download_button("Download Invoice PDF", data=pdf_bytes, file_name=f"{invoice_id}.pdf", mime="application/pdf")
         st.success("PDF generated and ready to download.", icon="✅")
 
     except Exception as e:
         st.error(f"Error generating PDF: {str(e)}", icon="⚠️")
 
-    finally:
-        # Cleanup temporary logo if applicable
-        if temp_logo_path and temp_logo_path.startswith("temp_logo") and os.path.exists(temp_logo_path):
-            os.remove(temp_logo_path)
-
 
-def display_discount_section(subtotal):
-    """Section for applying discounts (percentage or amount)."""
+def display_discount_section(invoice):
+    """Section for applying discounts (percentage or amount) to the invoice model."""
     st.header("Discount")
     discount_type = st.radio("Discount Type", ["Percentage", "Amount"])
 
-    # Initialize discount_amount and discount_percentage
-    discount_amount = 0
-    discount_percentage = 0
-
-    if subtotal == 0:
+    if invoice.subtotal == 0:
         st.warning("Subtotal is zero. Discounts cannot be applied.")
+        invoice.set_discount_amount(0)
     else:
         if discount_type == "Percentage":
-            discount_percentage = st.number_input("Discount (%)", min_value=0.0, max_value=100.0, value=0.0)
-            discount_amount = (discount_percentage / 100) * subtotal
+            invoice.set_discount_percentage(st.number_input("Discount (%)", min_value=0.0, max_value=100.0, value=0.0))
         else:  # discount_type == "Amount"
-            discount_amount = st.number_input("Discount Amount", min_value=0.0, value=0.0)
-            discount_percentage = (discount_amount / subtotal) * 100 if subtotal > 0 else 0
+            invoice.set_discount_amount(st.number_input("Discount Amount", min_value=0.0, value=0.0))
 
-    total = subtotal - discount_amount  # Calculate total once
     st.write(f"**Discount Type:** {discount_type}")
-    st.write(f"**Discount Percentage:** {discount_percentage:.2f}%")
-    st.write(f"**Discount Amount:** ${discount_amount:.2f}")
-    st.write(f"**Total:** ${total:.2f}")
-    return discount_amount, total
+    st.write(f"**Discount Percentage:** {invoice.discount_percentage:.2f}%")
+    st.write(f"**Discount Amount:** ${invoice.discount:.2f}")
+    st.write(f"**Total:** ${invoice.total:.2f}")
+    return invoice.discount, invoice.total
 
 # --- Main Streamlit App ---
 def main():
@@ -583,24 +671,20 @@ def main():
     company_name, company_logo, invoice_id, invoice_date, due_date = display_invoice_customization()
     client_name, client_contact = display_client_information()  # Get client info here
 
-    # Initialize variables to avoid NameError
-    subtotal = 0
-    discount_amount = 0
-    total = 0
+    invoice = st.session_state.products
 
     if page == "Products":
         display_and_manage_products()
-        subtotal = calculate_subtotal()  # Calculate subtotal after managing products
     elif page == "Discounts":
-        subtotal = calculate_subtotal()
-        discount_amount, total = display_discount_section(subtotal)
+        display_discount_section(invoice)
 
     if page in ["Products", "Discounts"]:
         if st.button("Generate PDF"):
             with st.spinner("Generating PDF..."):
+                # The running totals are read after this run's edits, so the PDF matches the screen
                 generate_and_download_pdf(
                     invoice_id, company_name, company_logo, invoice_date, due_date,
-                    client_name, client_contact, st.session_state.products, subtotal, discount_amount, total
+                    client_name, client_contact, invoice, invoice.subtotal, invoice.discount, invoice.total
                 )
 
 if __name__ == "__main__":
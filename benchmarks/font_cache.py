@@ -0,0 +1,61 @@
+"""Measures how much per-invoice latency the parsed-font cache saves.
+
+Run from the repository root:
+
+    python -m benchmarks.font_cache
+"""
+import time
+
+from fpdf import FPDF
+
+import utils.pdf_generator as pdf_generator
+from utils.font_cache import clear_font_cache, font_cache_stats
+from utils.pdf_generator import FONT_FILES, _register_fonts, build_invoice_pdf
+
+ROUNDS = 20
+SAMPLE_INVOICE = (
+    'INV-BENCH', 'Arkan Limited', None, '2024-01-01', '2024-01-31', 'عميل تجريبي', '0910000000',
+    [{"Description": "كرسي مكتب", "Quantity": 2, "Unit Price": 150.0, "Total": 300.0, "Sub-items": ["قاعدة معدنية"]}],
+    300.0, 0.0, 300.0,
+)
+
+
+def _uncached_register(pdf):
+    """Font registration as done before the cache: parse every TTF per document."""
+    for style, path in FONT_FILES.items():
+        pdf.add_font('Amiri', style, path, uni=True)
+
+
+def _time(func, rounds=ROUNDS):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def _render(register):
+    original = pdf_generator._register_fonts
+    pdf_generator._register_fonts = register
+    try:
+        build_invoice_pdf(*SAMPLE_INVOICE).output()
+    finally:
+        pdf_generator._register_fonts = original
+
+
+def main():
+    clear_font_cache()
+    _register_fonts(FPDF())  # warm the cache
+
+    uncached_reg = _time(lambda: _uncached_register(FPDF()))
+    cached_reg = _time(lambda: _register_fonts(FPDF()))
+    uncached_invoice = _time(lambda: _render(_uncached_register))
+    cached_invoice = _time(lambda: _render(_register_fonts))
+
+    print(f"font registration: {uncached_reg:7.2f} ms -> {cached_reg:7.2f} ms per invoice")
+    print(f"full invoice:      {uncached_invoice:7.2f} ms -> {cached_invoice:7.2f} ms per invoice")
+    print(f"saved per invoice: {uncached_invoice - cached_invoice:7.2f} ms")
+    print(f"cache stats: {font_cache_stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Measures the cold import time of the library modules used by workers and CLIs.
+
+Each module is imported in a fresh interpreter, as a batch worker or a CLI
+would, and timed from interpreter start to the end of the import. The report
+also says whether Streamlit was pulled in along the way.
+
+Run from the repository root:
+
+    python -m benchmarks.import_time
+"""
+import statistics
+import subprocess
+import sys
+
+MODULES = [
+    "utils",
+    "utils.num2text",
+    "utils.invoice_model",
+    "utils.invoice_store",
+    "utils.pdf_generator",
+    "utils.batch_invoices",
+]
+ROUNDS = 5
+
+_PROBE = (
+    "import time, sys; start = time.perf_counter(); import {module}; "
+    "print(time.perf_counter() - start, 'streamlit' in sys.modules)"
+)
+
+
+def measure(module, rounds=ROUNDS):
+    """Returns (median import seconds, whether Streamlit was imported) over fresh interpreters."""
+    timings = []
+    streamlit_loaded = False
+    for _ in range(rounds):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module)],
+            capture_output=True, text=True, check=True,
+        ).stdout.split()
+        timings.append(float(output[0]))
+        streamlit_loaded = output[1] == "True"
+    return statistics.median(timings), streamlit_loaded
+
+
+def main():
+    print(f"{'module':28} {'import (ms)':>12}  streamlit")
+    for module in MODULES:
+        seconds, streamlit_loaded = measure(module)
+        print(f"{module:28} {seconds * 1000:12.1f}  {'yes' if streamlit_loaded else 'no'}")
+
+
+if __name__ == "__main__":
+    main()
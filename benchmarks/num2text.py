@@ -0,0 +1,44 @@
+"""Measures Arabic amount-in-words conversion, one by one and in batches.
+
+Run from the repository root:
+
+    python -m benchmarks.num2text
+"""
+import time
+
+import numpy as np
+
+from utils.num2text import amount_to_words, amounts_to_words, milliemes_to_words, number_to_words
+
+AMOUNTS = 100_000
+DISTINCT_AMOUNTS = 5_000
+SEED = 7
+
+
+def _time(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    rng = np.random.default_rng(SEED)
+    numbers = rng.integers(0, 10**12, AMOUNTS).tolist()
+    # Invoice totals repeat a lot within a batch (same products, same prices)
+    amounts = np.round(rng.choice(rng.uniform(0, 250_000, DISTINCT_AMOUNTS), AMOUNTS), 3)
+    amount_list = amounts.tolist()
+
+    words = _time(lambda: [number_to_words(n) for n in numbers])
+    milliemes_to_words.cache_clear()
+    single = _time(lambda: [amount_to_words(a) for a in amount_list])
+    milliemes_to_words.cache_clear()
+    batch = _time(lambda: amounts_to_words(amounts))
+
+    print(f"number_to_words (0..10^12):   {words / AMOUNTS * 1e6:6.2f} us per number")
+    print(f"amount_to_words, one by one:  {single / AMOUNTS * 1e6:6.2f} us per amount")
+    print(f"amounts_to_words, batch:      {batch / AMOUNTS * 1e6:6.2f} us per amount")
+    print(f"cache: {milliemes_to_words.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
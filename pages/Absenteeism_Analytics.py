@@ -1,7 +1,8 @@
 import streamlit as st
-import plotly.io as pio
+from concurrent.futures import as_completed
 from pathlib import Path
-import json
+
+from utils.charts import get_chart_bundle
 # from footer import footer
 # from header import header
 
@@ -16,53 +17,72 @@ st.set_page_config(page_title=None, page_icon=None, layout="wide", initial_sideb
 
 # header()
 
-@st.cache_data(ttl=3600, max_entries=10)
-def load_figure_from_json(json_file: Path):
+def load_figure_from_json(bundle, chart: str):
     """
-    Loads a Plotly figure from a JSON file.
+    Loads a Plotly figure from the chart bundle through the shared figure cache.
 
     Args:
-        json_file (Path): Path to the JSON file containing the Plotly figure.
+        bundle (ChartBundle): The bundle of the page's chart directory.
+        chart (str): File name of the chart in the bundle.
 
     Returns:
-        plotly.graph_objs.Figure: The Plotly figure object.
+        plotly.graph_objs.Figure: A copy of the Plotly figure that may be modified.
         None: If an error occurs during file loading or JSON parsing.
     """
     try:
-        with open(json_file, 'r') as f:
-            figure_json = json.load(f)
-        return pio.from_json(json.dumps(figure_json))
-    except FileNotFoundError:
-        st.error(f"File {json_file} not found.")
-    except json.JSONDecodeError:
-        st.error(f"Error decoding JSON in {json_file}.")
+        return bundle.load(chart)
+    except KeyError:
+        st.error(f"File {chart} not found.")
+    except ValueError:
+        st.error(f"Error decoding JSON in {chart}.")
     return None
 
 
-def get_json_files(directory: Path) -> list:
-    """
-    Retrieves a list of JSON files from a specified directory.
+# Charts shown per page in "Show All Charts"
+CHARTS_PER_PAGE = 6
 
-    Args:
-        directory (Path): The directory to search for JSON files.
 
-    Returns:
-        list: A list of JSON filenames.
+def show_all_charts(bundle, charts: list, chart_height: int):
     """
-    return [f.name for f in directory.glob('*.json')]
-
+    Displays charts page by page, drawing each one as soon as it is loaded.
 
-def extract_file_types(json_files: list) -> set:
-    """
-    Extracts distinct file types from a list of JSON filenames.
+    The charts of the current page are loaded in background threads while
+    skeleton placeholders hold their places, and the next page is parsed
+    ahead so that paging forward is immediate.
 
     Args:
-        json_files (list): List of JSON filenames.
-
-    Returns:
-        set: A set of unique file types extracted from the filenames.
+        bundle (ChartBundle): The bundle of the page's chart directory.
+        charts (list): File names of the charts to display.
+        chart_height (int): Height of each chart in pixels.
     """
-    return set(f.split('_')[0] for f in json_files)
+    page_count = -(-len(charts) // CHARTS_PER_PAGE)
+    page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1) if page_count > 1 else 1
+    start = (page - 1) * CHARTS_PER_PAGE
+    visible = charts[start:start + CHARTS_PER_PAGE]
+
+    futures = bundle.load_async(visible)
+    bundle.preload(charts[start + CHARTS_PER_PAGE:start + 2 * CHARTS_PER_PAGE])
+
+    # Skeletons keep the layout stable while the charts arrive in any order
+    placeholders = {}
+    for chart, future in zip(visible, futures):
+        placeholder = st.empty()
+        placeholder.markdown(
+            f'<div style="height:{chart_height}px;border-radius:0.5rem;background:rgba(151,166,195,0.15);'
+            f'padding:1rem;color:rgba(49,51,63,0.6)">Loading chart: {chart}...</div>',
+            unsafe_allow_html=True,
+        )
+        placeholders[future] = (chart, placeholder)
+
+    for future in as_completed(placeholders):
+        chart, placeholder = placeholders[future]
+        try:
+            fig = future.result()
+        except Exception as e:
+            placeholder.error(f"Failed to load the chart: {chart} ({e})")
+            continue
+        fig.update_layout(height=chart_height)  # Set height; width will be responsive
+        placeholder.plotly_chart(fig, key=chart, use_container_width=True)  # Use container width
 
 def main():
     """
@@ -71,35 +91,23 @@ def main():
     # Directory where JSON files are stored
     chart_dir = Path('assets/absentee_graphs')
 
-    # Load available JSON files
-    json_files = get_json_files(chart_dir)
+    # Chart names, types and titles come from the bundle manifest
+    bundle = get_chart_bundle(chart_dir)
 
-    if not json_files:
+    if not bundle.charts:
         st.error("No JSON files found in the specified directory.")
         return
 
-    # Extract distinct file types for filtering
-    file_types = extract_file_types(json_files)
-
     # Streamlit UI components
     st.title("Interactive Absenteeism Data")
 
-    # Search bar to filter charts by name or metadata
-    search_query = st.text_input("Search by chart name")
-    if search_query:
-        filtered_json_files = [f for f in json_files if search_query.lower() in f.lower()]
-    else:
-        filtered_json_files = json_files
+    # Search bar to filter charts by name or title
+    search_query = st.text_input("Search by chart name or title")
 
     # Multiselect for filtering by file type
-    selected_file_types = st.multiselect("Filter by file type", sorted(file_types))
+    selected_file_types = st.multiselect("Filter by file type", bundle.types())
 
-    # Filter the JSON files based on selected file types
-    filtered_json_files = (
-        [f for f in filtered_json_files if f.split('_')[0] in selected_file_types]
-        if selected_file_types
-        else filtered_json_files
-    )
+    filtered_json_files = bundle.find(search_query, selected_file_types)
 
     # Ensure there's at least one file to display
     if not filtered_json_files:
@@ -116,22 +124,10 @@ def main():
     # Display the selected chart(s)
     if selected_chart != 'Select a chart...':
         if selected_chart == 'Show All Charts':
-            for chart in filtered_json_files:
-                chart_path = chart_dir / chart
-                
-                with st.spinner(f'Loading chart: {chart}...'):
-                    fig = load_figure_from_json(chart_path)
-                
-                if fig:
-                    fig.update_layout(height=chart_height)  # Set height; width will be responsive
-                    st.plotly_chart(fig, key=chart, use_container_width=True)  # Use container width
-                else:
-                    st.error(f"Failed to load the chart: {chart}")
+            show_all_charts(bundle, filtered_json_files, chart_height)
         else:
-            chart_path = chart_dir / selected_chart
-            
             with st.spinner('Loading chart...'):
-                fig = load_figure_from_json(chart_path)
+                fig = load_figure_from_json(bundle, selected_chart)
 
             if fig:
                 fig.update_layout(height=chart_height)  # Set height; width will be responsive
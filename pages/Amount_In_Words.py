@@ -0,0 +1,19 @@
+import streamlit as st
+
+from utils.num2text import format_currency
+
+# Streamlit UI
+st.title("تحويل الأرقام إلى كلمات عربية - الدينار الليبي")
+# Input from user
+user_input = st.text_input("أدخل المبلغ (بالدينار، على سبيل المثال: 1500.250):")
+# Validate input
+if user_input:
+    try:
+        amount = float(user_input)  # Accept decimal input
+        if amount >= 0:
+            arabic_words = format_currency(amount)  # Treat the input as Dinars
+            st.success(f"المبلغ {amount} يُكتب كـ: {arabic_words}")
+        else:
+            st.error("يرجى إدخال مبلغ غير سالب.")
+    except ValueError:
+        st.error("يرجى إدخال رقم صحيح.")
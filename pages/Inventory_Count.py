@@ -5,6 +5,8 @@ import qrcode
 from tqdm import tqdm  # for progress indicator
 import zxing
 
+from utils.search_index import SearchIndex
+
 def read_qr_code(image):
     try:
         reader = zxing.BarCodeReader()
@@ -35,6 +37,25 @@ def validate_csv(file):
         st.error(f"Invalid CSV file: {e}")
         return None
 
+def get_inventory_search_index(df):
+    """Returns the search index of the inventory, rebuilt only when the inventory is replaced."""
+    cached = st.session_state.get('inventory_search_index')
+    # The indexed frame is kept with its index, so a new frame can never be mistaken for it
+    if cached is None or cached[0] is not df:
+        index = SearchIndex.from_frame(df, ['Product ID', 'Product Name'], substring_columns=['Product ID'])
+        cached = (df, index)
+        st.session_state.inventory_search_index = cached
+    return cached[1]
+
+
+def search_inventory(df, search_term):
+    """Returns the row positions matching a search term, best matches first.
+
+    Words of the Product ID and name match by prefix, and Product IDs also
+    match anywhere inside (such as "001" in "F001"), after the word matches.
+    """
+    return get_inventory_search_index(df).search(search_term)
+
 # --- Session State Initialization ---
 if 'inventory_df' not in st.session_state:
     st.session_state.inventory_df = pd.DataFrame(columns=['Product ID', 'Product Name', 'Quantity'])
@@ -50,19 +71,25 @@ menu = st.sidebar.selectbox("Select an option", ["Inventory Management", "QR Cod
 if menu == "Inventory Management":
     st.title("Inventory Management")
     inventory_file = st.file_uploader("Upload Inventory File (CSV)", type=["csv"])
-    if inventory_file:
+    # The upload is only read again when another file is chosen, so reruns keep the inventory and its search index
+    if inventory_file and inventory_file.file_id != st.session_state.get('inventory_file_id'):
         with st.spinner("Validating and loading inventory..."):
             df = validate_csv(inventory_file)
             if df is not None:
                 st.session_state.inventory_df = df
+                st.session_state.inventory_file_id = inventory_file.file_id
                 st.success("Inventory loaded successfully!")
                 st.dataframe(st.session_state.inventory_df)
 
     if not st.session_state.inventory_df.empty:
         scanned_products = pd.DataFrame(list(st.session_state.qr_code_data.items()), columns=['Product ID', 'Scanned Quantity'])
         st.subheader("Search Inventory")
-        search_term = st.text_input("Search by Product ID:")
-        filtered_inventory = st.session_state.inventory_df.query("`Product ID`.str.contains(@search_term, case=False)", engine='python') if search_term else st.session_state.inventory_df
+        search_term = st.text_input("Search by Product ID or name:")
+        if search_term:
+            matches = search_inventory(st.session_state.inventory_df, search_term)
+            filtered_inventory = st.session_state.inventory_df.iloc[matches]
+        else:
+            filtered_inventory = st.session_state.inventory_df
         st.dataframe(filtered_inventory)
 
         
@@ -0,0 +1,46 @@
+from utils.batch_invoices import assign_invoice_ids, load_manifest
+from utils.invoice_store import InvoiceStore
+
+MANIFEST = """invoice_id,invoice_date,due_date,client_name,client_contact,description,quantity,unit_price
+A,2026-01-01,2026-02-01,client,091,chair,1,abc
+B,2026-01-01,2026-02-01,client,091,table,2,3.5
+C,2026-01-01,2026-02-01,client,091,sofa,1,10
+"""
+
+
+def test_bad_rows_fail_only_their_invoice(tmp_path):
+    path = tmp_path / "manifest.csv"
+    path.write_text(MANIFEST)
+    invoices = load_manifest(str(path), "Arkan")
+    assert [bool(invoice.get("error")) for invoice in invoices] == [True, False, False]
+
+
+def test_ids_are_reserved_only_for_valid_invoices(tmp_path):
+    path = tmp_path / "manifest.csv"
+    path.write_text(MANIFEST)
+    store = InvoiceStore(str(tmp_path / "invoices.sqlite3"))
+    invoices = assign_invoice_ids(load_manifest(str(path), "Arkan"), store)
+    assert [invoice["manifest_id"] for invoice in invoices] == ["A", "B", "C"]
+    assert invoices[0]["invoice_id"] == "A"
+    assert [invoice["invoice_id"][-6:] for invoice in invoices[1:]] == ["000001", "000002"]
+
+
+def test_rows_are_checked_like_the_invoice_page(tmp_path):
+    path = tmp_path / "manifest.csv"
+    path.write_text(
+        "invoice_id,invoice_date,due_date,client_name,client_contact,description,quantity,unit_price\n"
+        "A,2026-01-01,2026-02-01,client,091,chair,2.5,10\n"
+        "B,2026-01-01,2026-02-01,client,091,chair,0,10\n"
+        "C,2026-01-01,2026-02-01,client,091,chair,1,-1\n"
+        "D,2026-01-01,2026-02-01,client,091,,1,10\n"
+        ",2026-01-01,2026-02-01,client,091,sofa,1,10\n"
+        "0042,2026-01-01,2026-02-01,client,091,sofa,2.0,10\n"
+    )
+    invoices = load_manifest(str(path), "Arkan")
+    assert [invoice["manifest_id"] for invoice in invoices] == ["A", "B", "C", "D", "", "0042"]
+    assert "row 2: Quantity must be a whole number" in invoices[0]["error"]
+    assert "Quantity must be" in invoices[1]["error"]
+    assert "negative" in invoices[2]["error"]
+    assert "description is required" in invoices[3]["error"]
+    assert invoices[4]["error"] == "Rows with no invoice_id: 6"
+    assert not invoices[5].get("error") and invoices[5]["total"] == 20
@@ -0,0 +1,56 @@
+import orjson
+import pytest
+
+import os
+
+from utils.charts import ChartBundle, build_chart_bundle, get_chart_bundle
+
+
+@pytest.fixture
+def bundle(tmp_path):
+    chart_dir = tmp_path / "graphs"
+    chart_dir.mkdir()
+    for name, title in [("Bar_Top-Sales", "Best sellers"), ("Bar_Top-Profit", "Most profitable"),
+                        ("Heatmap_Sales-Time", "Sales by hour")]:
+        figure = {"data": [{"type": "bar", "y": [1, 2]}], "layout": {"title": {"text": title}}}
+        (chart_dir / f"{name}.json").write_bytes(orjson.dumps(figure))
+    return ChartBundle(build_chart_bundle(chart_dir, str(tmp_path / "graphs.zip")))
+
+
+def test_manifest_describes_every_chart(bundle):
+    assert bundle.types() == ["Bar", "Heatmap"]
+    entry = bundle.charts[0]
+    assert entry["name"] == "Bar_Top-Profit.json" and entry["traces"] == 1 and entry["title"] == "Most profitable"
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("sales", ["Bar_Top-Sales.json", "Heatmap_Sales-Time.json"]),
+    ("Bar_Top", ["Bar_Top-Profit.json", "Bar_Top-Sales.json"]),
+    ("Bar_Top-Sales.json", ["Bar_Top-Sales.json"]),
+    ("seller", ["Bar_Top-Sales.json"]),
+    ("op-Sal", ["Bar_Top-Sales.json"]),
+])
+def test_find_matches_words_and_file_names(bundle, query, expected):
+    assert sorted(bundle.find(query)) == expected
+
+
+def test_find_filters_by_type(bundle):
+    assert bundle.find("sales", ["Heatmap"]) == ["Heatmap_Sales-Time.json"]
+    assert bundle.load("Heatmap_Sales-Time.json").layout.title.text == "Sales by hour"
+
+
+def test_edited_charts_are_picked_up_on_the_next_access(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    chart = tmp_path / "graphs" / "Bar_Sales.json"
+    chart.parent.mkdir()
+
+    def write_chart(title, mtime_ns):
+        chart.write_bytes(orjson.dumps({"data": [], "layout": {"title": {"text": title}}}))
+        os.utime(chart, ns=(mtime_ns, mtime_ns))
+
+    write_chart("Before", 10**18)
+    assert get_chart_bundle("graphs").load("Bar_Sales.json").layout.title.text == "Before"
+    write_chart("After", 2 * 10**18)
+    bundle = get_chart_bundle("graphs")
+    assert bundle.charts[0]["title"] == "After"
+    assert bundle.load("Bar_Sales.json").layout.title.text == "After"
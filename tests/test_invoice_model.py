@@ -0,0 +1,23 @@
+from decimal import Decimal
+
+import pytest
+
+from utils.invoice_model import InvoiceModel, LineItem, to_money
+
+
+def test_to_money_rounds_half_up():
+    assert to_money(1.005) == Decimal("1.01")
+    assert to_money("2.5") == Decimal("2.50")
+
+
+@pytest.mark.parametrize("value", ["abc", "", float("nan"), float("inf"), Decimal("NaN")])
+def test_to_money_rejects_non_numeric_and_non_finite(value):
+    with pytest.raises(ValueError):
+        to_money(value)
+
+
+def test_subtotal_follows_line_changes():
+    model = InvoiceModel([LineItem("a", 2, "1.10"), LineItem("b", 1, "0.05")])
+    model[0] = LineItem("a", 3, "1.10")
+    del model[1]
+    assert model.subtotal == Decimal("3.30")
@@ -0,0 +1,46 @@
+import sqlite3
+from decimal import Decimal
+
+import pytest
+
+from utils.invoice_model import InvoiceModel, LineItem
+from utils.invoice_store import InvoiceStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return InvoiceStore(str(tmp_path / "invoices.sqlite3"))
+
+
+def _save(store, invoice_id, price, owner):
+    invoice = InvoiceModel([LineItem("chair", 2, price)])
+    store.save_invoice(invoice_id, "Arkan", "2026-01-01", "2026-02-01", "client", "091", invoice, owner=owner)
+
+
+def test_owner_may_replace_its_invoice(store):
+    _save(store, "INV-1", "10", owner="a")
+    _save(store, "INV-1", "12", owner="a")
+    assert store.load_invoice("INV-1")["products"].subtotal == Decimal("24.00")
+
+
+@pytest.mark.parametrize("owner", ["b", None])
+def test_other_sessions_cannot_overwrite_an_invoice(store, owner):
+    _save(store, "INV-1", "10", owner="a")
+    with pytest.raises(ValueError):
+        _save(store, "INV-1", "99", owner=owner)
+    stored = store.load_invoice("INV-1")
+    assert stored["products"].subtotal == Decimal("20.00") and len(stored["products"]) == 1
+
+
+def test_reserved_ids_are_unique(store):
+    assert len(set(store.reserve_invoice_ids(50)) | {store.allocate_invoice_id()}) == 51
+
+
+def test_stores_without_owner_column_are_migrated(tmp_path):
+    path = str(tmp_path / "old.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE invoices (invoice_id TEXT PRIMARY KEY, client_id INTEGER, client_name TEXT, "
+                 "client_contact TEXT, company_name TEXT, invoice_date TEXT, due_date TEXT, subtotal_cents INTEGER, "
+                 "discount_cents INTEGER, total_cents INTEGER, created_at TEXT)")
+    conn.close()
+    _save(InvoiceStore(path), "INV-1", "10", owner="a")
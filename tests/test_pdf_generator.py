@@ -0,0 +1,45 @@
+import io
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+from utils.invoice_model import InvoiceModel, LineItem
+from utils.pdf_generator import build_invoice_pdf, format_summaries
+
+pypdf = pytest.importorskip("pypdf")
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture(autouse=True)
+def repo_root(monkeypatch):
+    # Font and logo assets are resolved relative to the repository root
+    monkeypatch.chdir(REPO_ROOT)
+
+
+def _page_texts(products):
+    model = InvoiceModel(products)
+    pdf = build_invoice_pdf("INV-1", "Arkan", None, "2026-01-01", "2026-02-01", "client", "0910000000",
+                            model, model.subtotal, model.discount, model.total)
+    return [page.extract_text() for page in pypdf.PdfReader(io.BytesIO(bytes(pdf.output()))).pages]
+
+
+@pytest.mark.parametrize("lines, sub_items", [(300, 0), (120, 2), (60, 3), (59, 0)])
+def test_every_page_but_the_last_has_line_items(lines, sub_items):
+    texts = _page_texts(
+        LineItem(f"Item{i}", 1, Decimal("0.63"), [f"part{j}" for j in range(sub_items)]) for i in range(lines)
+    )
+    assert len(texts) > 1
+    empty = [number for number, text in enumerate(texts[:-1], 1) if "Item" not in text and "part" not in text]
+    assert empty == []
+
+
+def test_summaries_leave_out_words_only_for_totals_without_them():
+    summaries = format_summaries([
+        (Decimal("12.50"), Decimal("0"), Decimal("12.50")),
+        (Decimal("10") ** 13, Decimal("0"), Decimal("10") ** 13),
+        (Decimal("1"), Decimal("2"), Decimal("-1")),
+    ])
+    assert summaries[0]["words"] and summaries[0]["total"] == "$12.50"
+    assert summaries[1]["words"] is None and summaries[2]["words"] is None
@@ -0,0 +1,29 @@
+import pandas as pd
+
+from utils.search_index import SearchIndex
+
+
+def _inventory():
+    return pd.DataFrame({
+        "Product ID": ["F001", "F0010", "C200", "A-001"],
+        "Product Name": ["كرسي خشب", "Sofa", "Chair 001", "طاولة"],
+    })
+
+
+def test_words_match_by_prefix_and_normalized():
+    index = SearchIndex.from_frame(_inventory(), ["Product ID", "Product Name"])
+    assert index.search("كرس") == [0]
+    assert index.search("SOF") == [1]
+    assert index.search("001") == [2, 3]
+
+
+def test_substring_columns_match_inside_tokens_after_word_matches():
+    index = SearchIndex.from_frame(_inventory(), ["Product ID", "Product Name"], substring_columns=["Product ID"])
+    assert index.search("001") == [2, 3, 0, 1]
+    assert index.search("01") == [0, 1, 3]
+    assert index.search("001 chair") == [2]
+
+
+def test_missing_columns_and_empty_frames():
+    assert SearchIndex.from_frame(_inventory(), ["Missing"]).search("f001") == []
+    assert SearchIndex.from_frame(_inventory().iloc[:0], ["Product ID"]).search("f001") == []
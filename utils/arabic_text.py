@@ -0,0 +1,57 @@
+"""Memoized Arabic reshaping and bidi reordering for PDF text.
+
+`arabic_reshaper.reshape` followed by `bidi.get_display` is pure but slow, and
+invoices keep shaping the same strings: table headers, summary labels and
+product descriptions that repeat across lines and documents. Shaped strings
+are kept in a bounded LRU cache, and the static labels are shaped once at import.
+"""
+from functools import lru_cache
+
+from arabic_reshaper import reshape
+from bidi.algorithm import get_display
+
+# Maximum number of distinct shaped strings kept in memory
+SHAPE_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=SHAPE_CACHE_SIZE)
+def shape_text(text):
+    """Reshapes and reorders Arabic text for correct display."""
+    return get_display(reshape(text))
+
+
+def shape_many(texts):
+    """Shapes a list of strings in one call, shaping each distinct string only once."""
+    shaped = {text: shape_text(text) for text in dict.fromkeys(texts)}
+    return [shaped[text] for text in texts]
+
+
+def shaping_cache_stats():
+    """Returns hit/miss counters, current size and hit rate of the shaping cache."""
+    info = shape_text.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "max_size": info.maxsize,
+        "hit_rate": info.hits / lookups if lookups else 0.0,
+    }
+
+
+def clear_shaping_cache():
+    """Empties the shaping cache and resets its counters."""
+    shape_text.cache_clear()
+
+
+# Static invoice labels, shaped once per process.
+# Table headers are listed in RTL order (rightmost column last).
+TABLE_HEADERS = tuple(get_display(reshape(header)) for header in ["الإجمالي", "سعر الوحدة", "الكمية", "الوصف"])
+SUBTOTAL_LABEL = get_display(reshape("الإجمالي الفرعي:"))
+DISCOUNT_LABEL = get_display(reshape("الخصم:"))
+TOTAL_LABEL = get_display(reshape("الإجمالي:"))
+# Not shaped on its own: it is shaped together with the amount in words that follows it
+AMOUNT_IN_WORDS_LABEL = "المبلغ بالحروف:"
+PAGE_SUBTOTAL_LABEL = get_display(reshape("مجموع الصفحة:"))
+CLIENT_HEADING = get_display(reshape("الاخوة"))
+COMPANY_DETAILS = get_display(reshape("teleset DOGTAS LAZZONI MONTEL\nالهاتف: 0913273608"))
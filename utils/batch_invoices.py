@@ -0,0 +1,261 @@
+"""Batch generation of invoice PDFs across worker processes.
+
+Run from the repository root so the font and logo assets resolve:
+
+    python -m utils.batch_invoices manifest.csv --out invoices/ --company "Arkan Limited"
+
+The manifest holds one row per line item. Rows sharing an ``invoice_id`` are
+grouped into a single invoice. Line items are checked as the invoice page
+checks them; an invoice with a bad row, and the rows with no ``invoice_id``,
+are reported as failures. With ``--assign-ids`` the manifest IDs only
+group the rows, and the valid invoices get fresh IDs from the invoice store,
+reserved as one block before rendering starts. Results and the report keep
+each invoice's manifest ID alongside the ID it was issued under.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from decimal import Decimal, InvalidOperation
+
+from utils.arabic_text import shaping_cache_stats
+from utils.invoice_model import InvoiceModel, LineItem, to_money
+from utils.invoice_store import STORE_PATH, InvoiceStore
+from utils.pdf_generator import build_invoice_pdf, format_summaries, preload_fonts
+
+MANIFEST_COLUMNS = [
+    'invoice_id', 'invoice_date', 'due_date', 'client_name', 'client_contact',
+    'description', 'quantity', 'unit_price',
+]
+
+
+def load_manifest(path, company_name, logo_path=None):
+    """Reads a CSV/Excel manifest and groups its line items into invoice records."""
+    import pandas as pd  # Only the parent process reads manifests; workers never load pandas
+
+    # IDs are read as text, so "0042" keeps its zeros and blank IDs cannot turn the others into floats
+    if path.endswith('.csv'):
+        df = pd.read_csv(path, dtype={'invoice_id': str})
+    elif path.endswith(('.xls', '.xlsx')):
+        df = pd.read_excel(path, dtype={'invoice_id': str})
+    else:
+        raise ValueError("Unsupported manifest format. Please use a CSV or Excel file.")
+
+    missing_cols = [col for col in MANIFEST_COLUMNS if col not in df.columns]
+    if missing_cols:
+        raise ValueError(f"Missing required columns in manifest: {', '.join(missing_cols)}")
+
+    invoices = []
+    for invoice_id, rows in df.groupby('invoice_id', sort=False, dropna=False):
+        if pd.isna(invoice_id) or not invoice_id.strip():
+            invoices.append({"invoice_id": "", "manifest_id": "",
+                             "error": f"Rows with no invoice_id: {_row_numbers(rows)}"})
+            continue
+        try:
+            invoices.append(_build_invoice_record(str(invoice_id), rows, company_name, logo_path))
+        except (ValueError, TypeError) as e:
+            # Keep the bad invoice in the batch so it is reported as a failure
+            invoices.append({"invoice_id": str(invoice_id), "manifest_id": str(invoice_id),
+                             "error": f"Invalid manifest rows: {e}"})
+    return invoices
+
+
+def _build_invoice_record(invoice_id, rows, company_name, logo_path):
+    """Turns the manifest rows of one invoice into the arguments of `build_invoice_pdf`."""
+    first = rows.iloc[0]
+    products = InvoiceModel()
+    for row in rows.itertuples():
+        try:
+            products.append(_line_item(row))
+        except ValueError as e:
+            raise ValueError(f"row {row.Index + 2}: {e}") from None
+
+    if 'discount' in rows.columns and rows['discount'].notna().iloc[0]:
+        products.set_discount_amount(first['discount'])
+    return {
+        "invoice_id": invoice_id,
+        "manifest_id": invoice_id,
+        "company_name": company_name,
+        "logo_path": logo_path,
+        "date": first['invoice_date'],
+        "due_date": first['due_date'],
+        "client_name": str(first['client_name']),
+        "client_contact": str(first['client_contact']),
+        "products": products,
+        "subtotal": products.subtotal,
+        "discount": products.discount,
+        "total": products.total,
+    }
+
+
+def _line_item(row):
+    """Builds the line item of a manifest row, checked as `add_product` checks a line entered on the page.
+
+    Raises:
+        ValueError: If the description is empty, the quantity is not a whole
+            number greater than zero or the unit price is negative.
+    """
+    description = "" if row.description != row.description else str(row.description)  # NaN for an empty cell
+    if not description.strip():
+        raise ValueError("Product description is required.")
+    try:
+        quantity = Decimal(str(row.quantity).strip())
+    except InvalidOperation:
+        raise ValueError(f"Invalid quantity: {row.quantity!r}") from None
+    if not quantity.is_finite() or quantity != quantity.to_integral_value() or quantity <= 0:
+        raise ValueError(f"Quantity must be a whole number greater than zero: {row.quantity!r}")
+    unit_price = to_money(row.unit_price)
+    if unit_price < 0:
+        raise ValueError("Unit price cannot be negative.")
+    sub_items = getattr(row, 'sub_items', None)
+    return LineItem(
+        description.strip(),
+        int(quantity),
+        unit_price,
+        sub_items.split(';') if isinstance(sub_items, str) and sub_items else (),
+    )
+
+
+def _row_numbers(rows):
+    """Returns the spreadsheet row numbers of manifest rows (the header is row 1)."""
+    return ", ".join(str(index + 2) for index in rows.index)
+
+
+def assign_invoice_ids(invoices, store):
+    """Replaces the manifest IDs with one block of IDs reserved from `store`, in manifest order.
+
+    Invoices that already failed validation keep their manifest ID and use
+    no number. The manifest ID of each invoice is kept under "manifest_id".
+    """
+    valid = [invoice for invoice in invoices if not invoice.get("error")]
+    if not valid:
+        return invoices
+    for invoice, invoice_id in zip(valid, store.reserve_invoice_ids(len(valid))):
+        invoice["manifest_id"] = invoice.get("manifest_id", invoice["invoice_id"])
+        invoice["invoice_id"] = invoice_id
+    return invoices
+
+
+def prepare_summaries(invoices):
+    """Formats the summary strings of every valid invoice in one pass, before they are sent to the workers."""
+    valid = [invoice for invoice in invoices if not invoice.get('error')]
+    summaries = format_summaries((invoice['subtotal'], invoice['discount'], invoice['total']) for invoice in valid)
+    for invoice, summary in zip(valid, summaries):
+        invoice['summary'] = summary
+    return invoices
+
+
+def _init_worker():
+    """Loads the Amiri fonts once when a worker process starts."""
+    preload_fonts()
+
+
+def _render_invoice(invoice, output_dir):
+    """Renders one invoice to `output_dir` and reports how it went."""
+    start = time.perf_counter()
+    path = os.path.join(output_dir, f"{invoice['invoice_id']}.pdf")
+    ids = {"invoice_id": invoice['invoice_id'], "manifest_id": invoice.get('manifest_id', invoice['invoice_id'])}
+    try:
+        if invoice.get('error'):
+            raise ValueError(invoice['error'])
+        pdf = build_invoice_pdf(
+            invoice['invoice_id'], invoice['company_name'], invoice['logo_path'],
+            invoice['date'], invoice['due_date'], invoice['client_name'], invoice['client_contact'],
+            invoice['products'], invoice['subtotal'], invoice['discount'], invoice['total'],
+            summary=invoice.get('summary'),
+        )
+        pdf.output(path)
+        return {**ids, "status": "ok", "path": path,
+                "seconds": time.perf_counter() - start, "error": "",
+                "shape_hit_rate": shaping_cache_stats()['hit_rate']}
+    except Exception as e:
+        return {**ids, "status": "error", "path": "",
+                "seconds": time.perf_counter() - start, "error": str(e),
+                "shape_hit_rate": shaping_cache_stats()['hit_rate']}
+
+
+def generate_invoice_batch(invoices, output_dir, max_workers=None, on_result=None):
+    """Renders many invoices in parallel and returns one result per invoice.
+
+    The summary strings of the whole batch, including the amounts in words,
+    are formatted and shaped here in one pass before the workers start.
+
+    Args:
+        invoices (list): Invoice records as returned by `load_manifest`.
+        output_dir (str): Directory the PDFs are written to.
+        max_workers (int): Number of worker processes (defaults to the CPU count).
+        on_result (callable): Optional callback invoked with each result as it completes.
+
+    Returns:
+        list: Result dicts with invoice_id, manifest_id, status, path, seconds, error and the
+        worker's text-shaping cache hit rate, in the same order as `invoices`. A failed invoice never stops the batch.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    results = [None] * len(invoices)
+    prepare_summaries(invoices)
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as executor:
+        futures = {
+            executor.submit(_render_invoice, invoice, output_dir): i
+            for i, invoice in enumerate(invoices)
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:  # e.g. a worker crashed or the record could not be pickled
+                result = {"invoice_id": invoices[i].get('invoice_id'),
+                          "manifest_id": invoices[i].get('manifest_id', invoices[i].get('invoice_id')),
+                          "status": "error", "path": "",
+                          "seconds": 0.0, "error": str(e), "shape_hit_rate": 0.0}
+            results[i] = result
+            if on_result:
+                on_result(result)
+
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate invoice PDFs in bulk from a CSV/Excel manifest.")
+    parser.add_argument("manifest", help="CSV or Excel file with one row per line item")
+    parser.add_argument("--out", default="invoices", help="output directory for the PDFs")
+    parser.add_argument("--company", default="Arkan Limited", help="company name printed on every invoice")
+    parser.add_argument("--logo", default=os.path.join("assets", "logo.png"), help="logo image path")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--report", default=None, help="optional CSV file for per-invoice timings")
+    parser.add_argument("--assign-ids", action="store_true", help="issue new invoice IDs from the invoice store")
+    parser.add_argument("--db", default=STORE_PATH, help="invoice store used by --assign-ids")
+    args = parser.parse_args(argv)
+
+    logo_path = args.logo if args.logo and os.path.exists(args.logo) else None
+    invoices = load_manifest(args.manifest, args.company, logo_path)
+    if args.assign_ids and invoices:
+        assign_invoice_ids(invoices, InvoiceStore(args.db))
+
+    def _print_result(result):
+        label = result['invoice_id'] or "(no invoice_id)"
+        if result['manifest_id'] and result['manifest_id'] != result['invoice_id']:
+            label += f" (manifest {result['manifest_id']})"
+        if result['status'] == 'ok':
+            print(f"{label}: {result['seconds']:.3f}s -> {result['path']}")
+        else:
+            print(f"{label}: FAILED ({result['error']})")
+
+    start = time.perf_counter()
+    results = generate_invoice_batch(invoices, args.out, args.workers, on_result=_print_result)
+    elapsed = time.perf_counter() - start
+
+    failures = [r for r in results if r['status'] != 'ok']
+    print(f"Generated {len(results) - len(failures)}/{len(results)} invoices in {elapsed:.2f}s")
+    if results:
+        mean_hit_rate = sum(r['shape_hit_rate'] for r in results) / len(results)
+        print(f"Mean text shaping cache hit rate: {mean_hit_rate:.1%}")
+    if args.report:
+        import pandas as pd
+
+        pd.DataFrame(results).to_csv(args.report, index=False)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
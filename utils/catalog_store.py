@@ -0,0 +1,149 @@
+"""Columnar on-disk stock catalogs.
+
+An uploaded CSV/Excel catalog is streamed in row chunks into a zstd-compressed
+Parquet file named after the upload's content hash. Each chunk is validated
+and downcast to a fixed schema (Int32 quantities, float64 prices, text for
+everything else) before it is written as a row group, so converting a large
+supplier file never holds more than one chunk in memory. Reruns then read the
+file with memory mapping and load only the columns the page needs, with text
+columns decoded as categoricals.
+"""
+import os
+import tempfile
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from utils.data_handling import iter_stock_upload_chunks, stock_file_digest
+from utils.stock_validation import merge_validation_reports, validate_stock_frame
+
+CATALOG_DIR = os.path.join(".cache", "catalogs")
+
+# Columns used by the product-entry screen
+CATALOG_COLUMNS = ['manufacturer', 'code', 'model_name', 'description', 'color', 'size', 'quantity_available', 'price']
+
+# Fixed storage types of the numeric columns; every other column is stored as text
+INTEGER_COLUMNS = ['quantity', 'quantity_available']
+FLOAT_COLUMNS = ['price']
+INT32_MAX = 2**31 - 1
+
+MISSING_PLACEHOLDER = "<Missing>"
+
+
+def catalog_path(digest):
+    """Returns the path of the columnar catalog for a content hash."""
+    return os.path.join(CATALOG_DIR, f"{digest}.parquet")
+
+
+def ingest_stock_upload(uploaded_file, progress=None):
+    """Converts an uploaded stock file to a columnar catalog once and returns its path.
+
+    Args:
+        uploaded_file: A Streamlit `UploadedFile` holding a CSV or Excel file.
+        progress (callable, optional): Called with the fraction of the file
+            converted so far (0.0 to 1.0).
+
+    Returns:
+        tuple: (catalog path, validation report). The report is None when the
+            catalog already existed.
+    """
+    path = catalog_path(stock_file_digest(uploaded_file))
+    if os.path.exists(path):
+        return path, None
+    report = write_catalog_chunks(iter_stock_upload_chunks(uploaded_file), path, progress)
+    return path, report
+
+
+def write_catalog(df, path):
+    """Writes a whole stock DataFrame as a catalog and returns its validation report."""
+    return write_catalog_chunks([(df, 1.0)], path)
+
+
+def write_catalog_chunks(chunks, path, progress=None):
+    """Validates, downcasts and appends (chunk, fraction read) pairs to a new Parquet catalog.
+
+    The file is written under a unique temporary name and moved into place
+    when complete, so concurrent sessions (threads of one process, possibly
+    ingesting the same upload) never write to or read a partial catalog.
+
+    Returns:
+        dict: The validation report of the whole file.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)  # ParquetWriter opens the file by name
+    reports = []
+    writer = None
+    start_row = 0
+    try:
+        for chunk, fraction in chunks:
+            chunk = chunk.reset_index(drop=True)
+            reports.append(validate_stock_frame(chunk, start_row))
+            start_row += len(chunk)
+            chunk = prepare_catalog_chunk(chunk)
+            if writer is None:
+                schema = catalog_schema(chunk.columns)
+                writer = pq.ParquetWriter(tmp_path, schema, compression="zstd")
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            if progress:
+                progress(fraction)
+        if writer is None:
+            raise ValueError("The uploaded file contains no data.")
+        writer.close()
+        writer = None
+        os.replace(tmp_path, path)
+    finally:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return merge_validation_reports(reports)
+
+
+def catalog_schema(columns):
+    """Returns the fixed Arrow schema of a catalog with the given columns."""
+    fields = []
+    for col in columns:
+        if col in INTEGER_COLUMNS:
+            fields.append(pa.field(col, pa.int32()))
+        elif col in FLOAT_COLUMNS:
+            fields.append(pa.field(col, pa.float64()))
+        else:
+            fields.append(pa.field(col, pa.string()))
+    return pa.schema(fields)
+
+
+def prepare_catalog_chunk(chunk):
+    """Downcasts one chunk of stock data to the catalog schema.
+
+    Quantities become nullable Int32 (values that are not whole numbers within
+    range become missing) and prices float64. Text cells get the "<Missing>"
+    placeholder and are stringified, since spreadsheets often mix numbers and
+    text in one column.
+    """
+    chunk = chunk.copy()
+    for col in chunk.columns:
+        if col in INTEGER_COLUMNS:
+            values = pd.to_numeric(chunk[col], errors='coerce')
+            whole = (values % 1 == 0) & (values.abs() <= INT32_MAX)
+            chunk[col] = values.where(whole).astype("Int32")
+        elif col in FLOAT_COLUMNS:
+            chunk[col] = pd.to_numeric(chunk[col], errors='coerce').astype("float64")
+        else:
+            chunk[col] = chunk[col].fillna(MISSING_PLACEHOLDER).astype(str)
+    return chunk
+
+
+def load_catalog(path, columns=None):
+    """Loads a columnar catalog with memory mapping, reading only `columns` when given.
+
+    Requested columns missing from the catalog are ignored; if none of them
+    exist, every column is loaded. Text columns are decoded as categoricals.
+    """
+    schema = pq.read_schema(path, memory_map=True)
+    if columns is not None:
+        columns = [col for col in columns if col in schema.names] or None
+    text_columns = [field.name for field in schema if pa.types.is_string(field.type) and (columns is None or field.name in columns)]
+    table = pq.read_table(path, columns=columns, memory_map=True, read_dictionary=text_columns)
+    return table.to_pandas()
@@ -0,0 +1,275 @@
+"""Plotly chart bundles of the analytics pages.
+
+Each chart directory is packed into one compressed bundle (a zip archive
+with one member per chart) holding a manifest of every chart's name, type,
+size, trace count and title. The analytics pages list, filter and search
+charts from the manifest and read single figures from the bundle on demand,
+or a batch of them in a background thread pool so a page can draw each
+chart as soon as it is ready. Every access checks the names, sizes and
+modification times of the chart files, and a bundle is rebuilt when a chart
+was added, removed or modified. Bundles can also be built ahead of time with:
+
+    python -m utils.charts assets/absentee_graphs assets/inventory_graphs
+
+A chart is parsed once with orjson, straight into a Figure; the old loader
+parsed it with `json`, serialized it again and had Plotly parse it a second
+time. Parsed figures are shared by every session of the server process and
+keyed by the fingerprint of the chart files, so an edited chart is parsed
+again. Callers get their own copy of the shared figure (pages set the height
+on it). The copy skips Plotly's validation, which the shared figure already
+went through, and costs a few milliseconds instead of a pickle round trip.
+"""
+import argparse
+import hashlib
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import orjson
+import plotly.graph_objects as go
+import streamlit as st
+
+from utils.search_index import SearchIndex
+
+# Maximum number of parsed figures kept in memory
+FIGURE_CACHE_MAX_ENTRIES = 64
+# Maximum number of opened bundles kept in memory (older versions of a directory's bundle age out)
+BUNDLE_CACHE_MAX_ENTRIES = 8
+
+BUNDLE_DIR = os.path.join(".cache", "charts")
+MANIFEST_NAME = "manifest.json"
+# Version of the bundle layout; bundles of another version are rebuilt
+BUNDLE_FORMAT = 1
+# Threads loading charts in the background, shared by every session
+LOADER_THREADS = 4
+# Chart directories of the analytics pages
+CHART_DIRS = [os.path.join("assets", "absentee_graphs"), os.path.join("assets", "inventory_graphs")]
+
+
+def parse_figure(data):
+    """Builds a figure from Plotly JSON bytes or text.
+
+    Properties the installed Plotly no longer knows (such as the `heatmapgl`
+    template entries of charts exported by older versions) are skipped
+    instead of failing the whole chart.
+    """
+    return go.Figure(orjson.loads(data), skip_invalid=True)
+
+
+def copy_figure(fig):
+    """Returns an independent copy of an already validated figure without validating it again."""
+    return go.Figure(fig.to_dict(), _validate=False)
+
+
+def clear_figure_cache():
+    """Drops every shared figure."""
+    _bundled_figure.clear()
+
+
+# --- Chart bundles ---
+
+def bundle_path(chart_dir):
+    """Returns the path of the bundle built from a chart directory."""
+    return os.path.join(BUNDLE_DIR, f"{Path(chart_dir).name}.zip")
+
+
+def chart_dir_fingerprint(chart_dir):
+    """Returns a digest of the names, sizes and modification times of a directory's chart files."""
+    digest = hashlib.sha256()
+    for path in sorted(Path(chart_dir).glob("*.json")):
+        stat = path.stat()
+        digest.update(f"{path.name}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+
+def chart_entry(name, data):
+    """Returns the manifest entry of a chart file: name, type, size, trace count and title.
+
+    Files that are not valid JSON still get an entry (with no traces), so the
+    page lists them and reports the error when the chart is opened.
+    """
+    try:
+        figure = orjson.loads(data)
+    except orjson.JSONDecodeError:
+        figure = {}
+    title = figure.get("layout", {}).get("title") or ""
+    if isinstance(title, dict):
+        title = title.get("text") or ""
+    return {
+        "name": name,
+        "type": name.split("_")[0],
+        "size": len(data),
+        "traces": len(figure.get("data", [])),
+        "title": title,
+    }
+
+
+def build_chart_bundle(chart_dir, path=None):
+    """Packs the chart JSON files of a directory into one compressed bundle and returns its path.
+
+    Every chart is stored as its own deflated member, so one figure can be
+    read without decompressing the others. The bundle is written under a
+    unique temporary name and moved into place when complete.
+    """
+    path = path or bundle_path(chart_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    source = chart_dir_fingerprint(chart_dir)
+    entries = []
+    try:
+        with os.fdopen(fd, "wb") as f, zipfile.ZipFile(f, "w", compression=zipfile.ZIP_DEFLATED) as bundle:
+            for chart in sorted(Path(chart_dir).glob("*.json")):
+                data = chart.read_bytes()
+                entries.append(chart_entry(chart.name, data))
+                bundle.writestr(chart.name, data)
+            manifest = {"format": BUNDLE_FORMAT, "source": source, "charts": entries}
+            bundle.writestr(MANIFEST_NAME, orjson.dumps(manifest))
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
+
+
+class ChartBundle:
+    """An opened chart bundle: the manifest in memory, figures read from the archive on demand."""
+
+    def __init__(self, path):
+        self.path = path
+        self._archive = zipfile.ZipFile(path)
+        manifest = orjson.loads(self._archive.read(MANIFEST_NAME))
+        self.format = manifest["format"]
+        self.source = manifest["source"]
+        self.charts = manifest["charts"]
+        self._index = SearchIndex(_search_text(entry) for entry in self.charts)
+
+    @property
+    def names(self):
+        """Chart file names, in manifest order."""
+        return [entry["name"] for entry in self.charts]
+
+    def types(self):
+        """Returns the distinct chart types, sorted."""
+        return sorted({entry["type"] for entry in self.charts})
+
+    def find(self, query="", types=None):
+        """Returns the names of the charts matching a search query and any of `types`.
+
+        The query matches words of the chart name or title by prefix, as in
+        the product search, with "_" and "-" separating words as they do in
+        the indexed names. Charts whose file name contains the query as typed
+        (such as "Bar_Top" or a full file name) follow the word matches. An
+        empty query matches every chart.
+        """
+        if query.strip():
+            positions = self._index.search(_split_words(query))
+            matched = set(positions)
+            needle = query.strip().casefold()
+            positions += [
+                i for i, entry in enumerate(self.charts) if i not in matched and needle in entry["name"].casefold()
+            ]
+            entries = [self.charts[i] for i in positions]
+        else:
+            entries = self.charts
+        if types:
+            entries = [entry for entry in entries if entry["type"] in types]
+        return [entry["name"] for entry in entries]
+
+    def read(self, name):
+        """Returns the raw JSON bytes of one chart.
+
+        Raises:
+            KeyError: If the bundle has no chart of that name.
+        """
+        return self._archive.read(name)
+
+    def load(self, name):
+        """Returns one chart as a copy of the shared figure, which the caller may modify.
+
+        Raises:
+            KeyError: If the bundle has no chart of that name.
+            ValueError: If the chart is not valid JSON.
+        """
+        return copy_figure(_bundled_figure(self.path, self.source, name, self))
+
+    def load_async(self, names):
+        """Starts loading charts in the shared loader threads, in order.
+
+        Returns:
+            list: One future per name resolving to the figure, or raising as `load` does.
+        """
+        loader = get_chart_loader()
+        return [loader.submit(self.load, name) for name in names]
+
+    def preload(self, names):
+        """Parses charts into the shared figure cache in the background, for charts shown next."""
+        loader = get_chart_loader()
+        for name in names:
+            loader.submit(_bundled_figure, self.path, self.source, name, self)
+
+
+@st.cache_resource(show_spinner=False)
+def get_chart_loader():
+    """Returns the thread pool that loads charts in the background for every session."""
+    return ThreadPoolExecutor(max_workers=LOADER_THREADS, thread_name_prefix="chart-loader")
+
+
+def get_chart_bundle(chart_dir):
+    """Returns the opened bundle of a chart directory, shared by every session of this process.
+
+    The bundle is keyed by the fingerprint of the directory's chart files,
+    which costs one `stat` per file. When a chart is added, removed or
+    modified, the next access rebuilds the bundle and opens the new one.
+    """
+    return _open_chart_bundle(str(chart_dir), chart_dir_fingerprint(chart_dir))
+
+
+@st.cache_resource(max_entries=BUNDLE_CACHE_MAX_ENTRIES, show_spinner=False)
+def _open_chart_bundle(chart_dir, source):
+    """Opens the bundle of `chart_dir`, rebuilding it unless it was built from the current files (`source`)."""
+    path = bundle_path(chart_dir)
+    if not _bundle_is_current(path, source):
+        build_chart_bundle(chart_dir, path)
+    return ChartBundle(path)
+
+
+def _bundle_is_current(path, source):
+    """Tells whether the bundle at `path` exists and was built from chart files of fingerprint `source`."""
+    try:
+        with zipfile.ZipFile(path) as bundle:
+            manifest = orjson.loads(bundle.read(MANIFEST_NAME))
+    except (OSError, KeyError, zipfile.BadZipFile, orjson.JSONDecodeError):
+        return False
+    return manifest.get("format") == BUNDLE_FORMAT and manifest.get("source") == source
+
+
+@st.cache_resource(max_entries=FIGURE_CACHE_MAX_ENTRIES, show_spinner=False)
+def _bundled_figure(path, source, name, _bundle):
+    """Parses one bundled chart once per version of the chart files (`_bundle` is left out of the cache key)."""
+    return parse_figure(_bundle.read(name))
+
+
+def _split_words(text):
+    """Turns the "_" and "-" separators of chart names into spaces, so they split words."""
+    return text.replace("_", " ").replace("-", " ")
+
+
+def _search_text(entry):
+    """Returns the searchable words of a manifest entry: the name split into words, and the title."""
+    return f"{_split_words(entry['name'].rsplit('.', 1)[0])} {entry['title']}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pack chart directories into bundles for the analytics pages.")
+    parser.add_argument("chart_dirs", nargs="*", default=CHART_DIRS, help="directories of Plotly JSON charts")
+    args = parser.parse_args(argv)
+    for chart_dir in args.chart_dirs:
+        path = build_chart_bundle(chart_dir)
+        bundle = ChartBundle(path)
+        print(f"{chart_dir}: {len(bundle.charts)} charts -> {path} ({os.path.getsize(path) / 1024:.0f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,47 +1,40 @@
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+import openpyxl
 import pandas as pd
 import streamlit as st
 
+from utils.stock_validation import build_unique_values, format_validation_report, validate_stock_frame
+
+# Bounds of the parsed stock-file cache
+STOCK_CACHE_MAX_BYTES = 512 * 1024 * 1024
+STOCK_CACHE_MAX_ENTRIES = 8
+# Rows per chunk when streaming a stock file into the catalog store
+STOCK_CHUNK_ROWS = 50_000
+
+_parsed_stock = OrderedDict()  # (content hash, variant) -> (DataFrame or None, messages, size in bytes)
+_digests = {}  # Streamlit upload file_id -> content hash
+_cache_lock = threading.Lock()
+
 
 def upload_and_process_stock_data(uploaded_file):
     """Handles uploading stock data, calculating unique values, and data validation."""
     if uploaded_file is not None:
         try:
-            combined_df = pd.read_excel(uploaded_file)
-
-            # 1. Add missing 'price' column if not present, defaulting to 0
-            if 'price' not in combined_df.columns:
-                combined_df['price'] = 0.0  # Default price to 0
-                st.warning("The 'price' column is missing. It has been added and defaulted to 0.")
-
-            # 2. Validate required columns (after adding 'price' if needed)
-            required_cols = ['description', 'price']  # Add other required columns
-            missing_cols = [col for col in required_cols if col not in combined_df.columns]
-            if missing_cols:
-                st.error(f"Missing required columns in Excel file: {', '.join(missing_cols)}")
+            combined_df, messages = _cached_parse(uploaded_file, 'stock', _parse_stock_data)
+            for level, message in messages:
+                getattr(st, level)(message)
+            if combined_df is None:
                 return None
 
-            # 3. Convert relevant columns to numeric, handle errors
-            numeric_cols = ['quantity', 'price']  # 'price' is now always present
-            for col in numeric_cols:
-                if col in combined_df.columns:
-                    combined_df[col] = pd.to_numeric(combined_df[col], errors='coerce')
-                    invalid_rows = combined_df[combined_df[col].isna()]
-                    if not invalid_rows.empty:
-                        st.warning(f"Invalid numeric values found in column '{col}'. These rows will be ignored:\n{invalid_rows}")
-
-            # 3. Calculate unique values efficiently, handle TypeError
-            if 'unique_values' not in st.session_state or st.session_state.get('unique_values_file') != uploaded_file:
-                unique_values = {}
-                for col in combined_df.columns:
-                    if col != 'description':  # Or any other columns to exclude
-                        unique_vals = combined_df[col].dropna().unique()
-                        try:
-                            unique_vals = sorted(unique_vals)
-                        except TypeError:
-                            unique_vals = sorted(unique_vals, key=lambda x: (isinstance(x, str), x))
-                        unique_values[col] = unique_vals
-                st.session_state['unique_values'] = unique_values
-                st.session_state['unique_values_file'] = uploaded_file
+            # Distinct values per column for the filters, computed once per file
+            digest = stock_file_digest(uploaded_file)
+            if 'unique_values' not in st.session_state or st.session_state.get('unique_values_file') != digest:
+                st.session_state['unique_values'] = build_unique_values(combined_df)
+                st.session_state['unique_values_file'] = digest
 
             return combined_df
 
@@ -54,6 +47,147 @@ def upload_and_process_stock_data(uploaded_file):
 
     return None  # Return None if no file is uploaded
 
+
+def load_stock_frame(uploaded_file):
+    """Parses an uploaded CSV/Excel stock file for product entry, with NaN shown as "<Missing>".
+
+    The parsed DataFrame is cached by content hash and shared between reruns;
+    callers must treat it as read-only.
+    """
+    df, _ = _cached_parse(uploaded_file, 'entry', _parse_entry_data)
+    return df
+
+
+def stock_file_digest(uploaded_file):
+    """Returns the SHA-256 hex digest of an uploaded file's content (memoized per upload)."""
+    file_id = getattr(uploaded_file, 'file_id', None)
+    digest = _digests.get(file_id) if file_id else None
+    if digest is None:
+        digest = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+        if file_id:
+            _digests[file_id] = digest
+    return digest
+
+
+def _cached_parse(uploaded_file, variant, parse):
+    """Returns `parse(uploaded_file)` from the LRU cache, parsing on a miss.
+
+    Entries are evicted least-recently-used first once the cache holds more
+    than `STOCK_CACHE_MAX_ENTRIES` frames or `STOCK_CACHE_MAX_BYTES` bytes.
+    """
+    key = (stock_file_digest(uploaded_file), variant)
+    with _cache_lock:
+        entry = _parsed_stock.get(key)
+        if entry is not None:
+            _parsed_stock.move_to_end(key)
+            return entry[0], entry[1]
+
+    df, messages = parse(uploaded_file)
+    size = int(df.memory_usage(deep=True).sum()) if df is not None else 0
+
+    with _cache_lock:
+        _parsed_stock[key] = (df, messages, size)
+        total = sum(entry[2] for entry in _parsed_stock.values())
+        while len(_parsed_stock) > 1 and (len(_parsed_stock) > STOCK_CACHE_MAX_ENTRIES or total > STOCK_CACHE_MAX_BYTES):
+            _, evicted = _parsed_stock.popitem(last=False)
+            total -= evicted[2]
+    return df, messages
+
+
+def read_stock_upload(uploaded_file):
+    """Reads an uploaded CSV or Excel file into a DataFrame based on its extension."""
+    file_extension = uploaded_file.name.split('.')[-1].lower()
+    data = io.BytesIO(uploaded_file.getvalue())
+    if file_extension == 'csv':
+        return pd.read_csv(data)
+    if file_extension in ['xls', 'xlsx']:
+        return pd.read_excel(data)
+    raise ValueError("Unsupported file format. Please upload a CSV or Excel file.")
+
+
+def iter_stock_upload_chunks(uploaded_file, chunk_rows=STOCK_CHUNK_ROWS):
+    """Yields an uploaded CSV or Excel file as DataFrames of at most `chunk_rows` rows.
+
+    Cells are read as text (numbers are left to the caller to coerce), so every
+    chunk has the same column types however the values are spread across the
+    file. CSV is read with the chunked pandas parser and .xlsx sheets with
+    openpyxl's streaming read-only mode; legacy .xls files are read whole and
+    then split.
+
+    Yields:
+        tuple: (chunk DataFrame, fraction of the file read so far)
+    """
+    file_extension = uploaded_file.name.split('.')[-1].lower()
+    data = io.BytesIO(uploaded_file.getvalue())
+    if file_extension == 'csv':
+        size = max(len(data.getbuffer()), 1)
+        with pd.read_csv(data, dtype=str, chunksize=chunk_rows) as reader:
+            for chunk in reader:
+                yield chunk, min(data.tell() / size, 1.0)
+    elif file_extension == 'xlsx':
+        yield from _iter_xlsx_chunks(data, chunk_rows)
+    elif file_extension == 'xls':
+        df = pd.read_excel(data, dtype=str)
+        for start in range(0, len(df), chunk_rows):
+            yield df.iloc[start:start + chunk_rows], min((start + chunk_rows) / len(df), 1.0)
+    else:
+        raise ValueError("Unsupported file format. Please upload a CSV or Excel file.")
+
+
+def _iter_xlsx_chunks(data, chunk_rows):
+    """Streams the first sheet of an .xlsx workbook in row chunks of text cells."""
+    workbook = openpyxl.load_workbook(data, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(name) for name in header]
+        total_rows = max((sheet.max_row or 0) - 1, 1)
+        read_rows = 0
+        batch = []
+        for row in rows:
+            batch.append([None if value is None else str(value) for value in row[:len(columns)]])
+            if len(batch) == chunk_rows:
+                read_rows += len(batch)
+                yield pd.DataFrame(batch, columns=columns, dtype=object), min(read_rows / total_rows, 1.0)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=columns, dtype=object), 1.0
+    finally:
+        workbook.close()
+
+
+def _parse_entry_data(uploaded_file):
+    """Parses a stock file for the product-entry screen."""
+    df = read_stock_upload(uploaded_file)
+    df = df.fillna("<Missing>")  # Convert NaN to a unique placeholder
+    return df, []
+
+
+def _parse_stock_data(uploaded_file):
+    """Parses and validates a stock file, returning the DataFrame and the messages to show."""
+    messages = []
+    combined_df = read_stock_upload(uploaded_file)
+
+    # 1. Add missing 'price' column if not present, defaulting to 0
+    if 'price' not in combined_df.columns:
+        combined_df['price'] = 0.0  # Default price to 0
+        messages.append(("warning", "The 'price' column is missing. It has been added and defaulted to 0."))
+
+    # 2. Validate required columns and row values in one vectorized pass
+    report = validate_stock_frame(combined_df)
+    if report["missing_columns"]:
+        messages.append(("error", f"Missing required columns in Excel file: {', '.join(report['missing_columns'])}"))
+        return None, messages
+
+    summary = format_validation_report(report)
+    if summary:
+        messages.append(("warning", summary))
+
+    return combined_df, messages
+
 def filter_dataframe(df, selected_values):
     """Filters the DataFrame based on selected values."""
     if df is None: # Handle case where df is None
@@ -0,0 +1,77 @@
+"""Process-wide cache of parsed TrueType fonts for FPDF documents.
+
+fpdf2 parses a TTF and rebuilds its width and glyph tables on every
+`FPDF.add_font` call. The parsed font is kept here for the life of the process,
+so it survives Streamlit reruns and batch workers. Each document gets a cheap
+copy of it. An entry is re-parsed when the file's mtime or size changes.
+
+The legacy `.pkl` metric files in `assets/fonts` were written by the old
+PyFPDF and cannot be loaded by fpdf2, so they are not used.
+"""
+import copy
+import io
+import os
+import threading
+
+from fontTools import ttLib
+from fpdf import FPDF
+
+# (family, style, path) -> ((mtime_ns, size), parsed TTFFont, raw TTF bytes)
+_fonts = {}
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def _file_signature(path):
+    """Returns the (mtime_ns, size) pair used to detect a changed font file."""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def get_parsed_font(family, style, path):
+    """Returns the parsed font and its raw bytes, parsing the file only when needed."""
+    key = (family, style, path)
+    signature = _file_signature(path)
+    with _lock:
+        entry = _fonts.get(key)
+        if entry and entry[0] == signature:
+            _stats["hits"] += 1
+            return entry[1], entry[2]
+        _stats["misses"] += 1
+
+    scratch = FPDF()
+    scratch.add_font(family, style, path, uni=True)
+    parsed = scratch.fonts[f"{family.lower()}{style}"]
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    with _lock:
+        _fonts[key] = (signature, parsed, data)
+    return parsed, data
+
+
+def add_cached_font(pdf, family, style, path):
+    """Registers a font on `pdf` like `FPDF.add_font`, reusing the process-wide parse."""
+    parsed, data = get_parsed_font(family, style, path)
+
+    # Metrics and glyph maps are shared; the fontTools object and the glyph
+    # subset are per document because output() subsets the font in place.
+    font = copy.copy(parsed)
+    font.i = len(pdf.fonts) + 1
+    font.ttfont = ttLib.TTFont(io.BytesIO(data), recalcTimestamp=False, fontNumber=0, lazy=True)
+    font.missing_glyphs = []
+    font.subset = copy.deepcopy(parsed.subset, {id(parsed): font})
+    pdf.fonts[parsed.fontkey] = font
+
+
+def font_cache_stats():
+    """Returns hit/miss counters and the number of cached fonts."""
+    with _lock:
+        return {**_stats, "fonts": len(_fonts)}
+
+
+def clear_font_cache():
+    """Drops every cached font and resets the counters."""
+    with _lock:
+        _fonts.clear()
+        _stats["hits"] = _stats["misses"] = 0
@@ -0,0 +1,228 @@
+"""Invoice line items with running, exact money totals.
+
+`InvoiceModel` stores its lines column-wise: descriptions in a list,
+quantities and unit prices (in integer cents) in `array` buffers, and
+sub-items only for the lines that have some. Large project invoices then
+take a fraction of the memory of one dict per line and pickle as a few flat
+buffers. Reading a line yields a slotted `LineItem`.
+
+The subtotal is updated on every change, so reading the subtotal, discount or
+total is O(1) instead of a sum over all lines on each rerun. Money is exposed
+as `Decimal` rounded to cents, so totals are exact and the PDF shows the same
+figures as the screen.
+"""
+from array import array
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+CENT = Decimal("0.01")
+ZERO = Decimal("0.00")
+
+
+def to_money(value):
+    """Converts a number to a Decimal rounded to cents (floats go through their shortest repr).
+
+    Raises:
+        ValueError: If `value` is not a number, or is NaN or infinite.
+    """
+    if not isinstance(value, Decimal):
+        try:
+            value = Decimal(str(value).strip())
+        except InvalidOperation:
+            raise ValueError(f"Invalid amount: {value!r}") from None
+    if not value.is_finite():
+        raise ValueError(f"Invalid amount: {value!r}")
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def to_cents(value):
+    """Converts a number to an integer amount of cents."""
+    return int(to_money(value) * 100)
+
+
+def from_cents(cents):
+    """Converts an integer amount of cents to a Decimal."""
+    return Decimal(cents).scaleb(-2)
+
+
+class LineItem:
+    """One invoice line: description, quantity, unit price, total and sub-items."""
+
+    __slots__ = ("description", "quantity", "unit_price", "total", "sub_items")
+
+    def __init__(self, description, quantity, unit_price, sub_items=()):
+        self.description = description
+        self.quantity = int(quantity)
+        self.unit_price = to_money(unit_price)
+        self.total = self.unit_price * self.quantity
+        self.sub_items = tuple(sub_items or ())
+
+    @classmethod
+    def from_dict(cls, product):
+        """Builds a line from a product dict ("Description", "Quantity", "Unit Price", "Sub-items")."""
+        return cls(product["Description"], product["Quantity"], product["Unit Price"], product.get("Sub-items"))
+
+    def to_dict(self):
+        """Returns the line as an editable product dict."""
+        return {
+            "Description": self.description,
+            "Quantity": self.quantity,
+            "Unit Price": self.unit_price,
+            "Total": self.total,
+            "Sub-items": list(self.sub_items),
+        }
+
+    def __eq__(self, other):
+        if not isinstance(other, LineItem):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return f"LineItem({self.description!r}, {self.quantity}, {self.unit_price}, {list(self.sub_items)!r})"
+
+
+def as_line_item(product):
+    """Returns `product` as a `LineItem`, converting a product dict if needed."""
+    return product if isinstance(product, LineItem) else LineItem.from_dict(product)
+
+
+class InvoiceModel:
+    """Column-stored invoice lines that maintain the subtotal, discount and total incrementally.
+
+    Supports `append`, indexing, item assignment, deletion and iteration.
+    Lines can be given as `LineItem`s or product dicts; they are always read
+    back as `LineItem`s with the total recomputed from quantity and unit price.
+    """
+
+    __slots__ = ("_descriptions", "_quantities", "_prices", "_sub_items", "_subtotal_cents",
+                 "_discount_percentage", "_discount_cents")
+
+    def __init__(self, products=()):
+        self._descriptions = []
+        self._quantities = array("q")
+        self._prices = array("q")  # Unit prices in cents
+        self._sub_items = {}  # Line position -> tuple of sub-items, for lines that have any
+        self._subtotal_cents = 0
+        self._discount_percentage = None  # Set when the discount is a percentage of the subtotal
+        self._discount_cents = 0
+        for product in products:
+            self.append(product)
+
+    def __len__(self):
+        return len(self._descriptions)
+
+    def __iter__(self):
+        sub_items = self._sub_items
+        for i, (description, quantity, price) in enumerate(zip(self._descriptions, self._quantities, self._prices)):
+            yield self._line(description, quantity, price, sub_items.get(i, ()))
+
+    def __getitem__(self, index):
+        index = self._position(index)
+        return self._line(self._descriptions[index], self._quantities[index], self._prices[index], self._sub_items.get(index, ()))
+
+    def __setitem__(self, index, product):
+        index = self._position(index)
+        item = as_line_item(product)
+        price = to_cents(item.unit_price)
+        self._subtotal_cents += item.quantity * price - self._quantities[index] * self._prices[index]
+        self._descriptions[index] = item.description
+        self._quantities[index] = item.quantity
+        self._prices[index] = price
+        self._set_sub_items(index, item.sub_items)
+
+    def __delitem__(self, index):
+        index = self._position(index)
+        self._subtotal_cents -= self._quantities[index] * self._prices[index]
+        del self._descriptions[index]
+        del self._quantities[index]
+        del self._prices[index]
+        # Lines after the deleted one move up by one position
+        self._sub_items = {
+            (i if i < index else i - 1): items for i, items in self._sub_items.items() if i != index
+        }
+
+    def __getstate__(self):
+        return (self._descriptions, self._quantities, self._prices, self._sub_items,
+                self._subtotal_cents, self._discount_percentage, self._discount_cents)
+
+    def __setstate__(self, state):
+        (self._descriptions, self._quantities, self._prices, self._sub_items,
+         self._subtotal_cents, self._discount_percentage, self._discount_cents) = state
+
+    def append(self, product):
+        """Adds a line and returns it as a `LineItem`."""
+        item = as_line_item(product)
+        price = to_cents(item.unit_price)
+        self._descriptions.append(item.description)
+        self._quantities.append(item.quantity)
+        self._prices.append(price)
+        self._set_sub_items(len(self._descriptions) - 1, item.sub_items)
+        self._subtotal_cents += item.quantity * price
+        return item
+
+    def clear(self):
+        """Removes every line (the discount setting is kept)."""
+        self._descriptions.clear()
+        del self._quantities[:]
+        del self._prices[:]
+        self._sub_items.clear()
+        self._subtotal_cents = 0
+
+    @property
+    def subtotal(self):
+        """Sum of the line totals."""
+        return from_cents(self._subtotal_cents)
+
+    @property
+    def discount(self):
+        """Discount amount, derived from the percentage when one is set."""
+        if self._discount_percentage is not None:
+            return to_money(self.subtotal * self._discount_percentage / 100)
+        return from_cents(self._discount_cents)
+
+    @property
+    def discount_percentage(self):
+        """Discount as a percentage of the subtotal."""
+        if self._discount_percentage is not None:
+            return self._discount_percentage
+        return Decimal(self._discount_cents) / self._subtotal_cents * 100 if self._subtotal_cents else ZERO
+
+    @property
+    def total(self):
+        """Subtotal minus discount."""
+        return self.subtotal - self.discount
+
+    def set_discount_percentage(self, percentage):
+        """Applies a discount of `percentage` percent of the subtotal, following later line changes."""
+        self._discount_percentage = Decimal(str(percentage))
+        self._discount_cents = 0
+
+    def set_discount_amount(self, amount):
+        """Applies a fixed discount amount."""
+        self._discount_percentage = None
+        self._discount_cents = to_cents(amount)
+
+    def _position(self, index):
+        """Returns the non-negative position of `index`, raising IndexError when out of range."""
+        if not isinstance(index, int):
+            raise TypeError("InvoiceModel indices must be integers.")
+        length = len(self._descriptions)
+        if not -length <= index < length:
+            raise IndexError("Invoice line index out of range.")
+        return index % length
+
+    def _set_sub_items(self, index, sub_items):
+        if sub_items:
+            self._sub_items[index] = tuple(sub_items)
+        else:
+            self._sub_items.pop(index, None)
+
+    @staticmethod
+    def _line(description, quantity, price_cents, sub_items):
+        """Builds a `LineItem` from stored columns without re-rounding."""
+        item = LineItem.__new__(LineItem)
+        item.description = description
+        item.quantity = quantity
+        item.unit_price = from_cents(price_cents)
+        item.total = from_cents(price_cents * quantity)
+        item.sub_items = sub_items
+        return item
@@ -0,0 +1,309 @@
+"""Persistent client and invoice store on an embedded SQLite database.
+
+The database runs in WAL mode, so Streamlit sessions can read while another
+one writes. Connections come from a small pool shared by every session of the
+server process. Client names are stored with a normalized lookup key (the
+same Arabic/Latin folding as the product search) and indexed, so the
+typeahead is an index range scan however many clients there are.
+
+Money is stored in integer cents.
+"""
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+
+from utils.invoice_model import InvoiceModel, LineItem, from_cents, to_cents
+from utils.text_normalization import normalize
+
+STORE_PATH = os.path.join("data", "invoices.sqlite3")
+# Connections kept open per store
+POOL_SIZE = 4
+# Milliseconds a writer waits for another writer before failing
+BUSY_TIMEOUT_MS = 5000
+# Maximum number of names returned by the client typeahead
+TYPEAHEAD_LIMIT = 20
+# Sequence the invoice numbers are drawn from
+INVOICE_SEQUENCE = "invoice"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS clients (
+    client_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    name_key TEXT NOT NULL,
+    contact TEXT NOT NULL DEFAULT '',
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS clients_name_key ON clients (name_key);
+
+CREATE TABLE IF NOT EXISTS invoices (
+    invoice_id TEXT PRIMARY KEY,
+    client_id INTEGER REFERENCES clients (client_id),
+    client_name TEXT NOT NULL,
+    client_contact TEXT NOT NULL,
+    company_name TEXT NOT NULL,
+    invoice_date TEXT NOT NULL,
+    due_date TEXT NOT NULL,
+    subtotal_cents INTEGER NOT NULL,
+    discount_cents INTEGER NOT NULL,
+    total_cents INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    owner TEXT
+);
+CREATE INDEX IF NOT EXISTS invoices_client ON invoices (client_id);
+CREATE INDEX IF NOT EXISTS invoices_created ON invoices (created_at);
+
+CREATE TABLE IF NOT EXISTS line_items (
+    invoice_id TEXT NOT NULL REFERENCES invoices (invoice_id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    description TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    unit_price_cents INTEGER NOT NULL,
+    sub_items TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (invoice_id, position)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS id_sequences (
+    name TEXT PRIMARY KEY,
+    next_value INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+# Separator of sub-items stored in one column
+_SUB_ITEM_SEPARATOR = "\n"
+
+
+class ConnectionPool:
+    """A bounded pool of SQLite connections that may be used from any thread."""
+
+    def __init__(self, path, size=POOL_SIZE):
+        self.path = path
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self):
+        """Yields a pooled connection inside a transaction, committed on success."""
+        with self._slots:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            try:
+                with conn:
+                    yield conn
+            finally:
+                self._idle.put(conn)
+
+    def close(self):
+        """Closes the idle connections."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # Durable at checkpoints, safe against corruption
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+
+class InvoiceStore:
+    """Clients, invoices and their line items in one SQLite database."""
+
+    def __init__(self, path=STORE_PATH, pool_size=POOL_SIZE):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.pool = ConnectionPool(path, pool_size)
+        with self.pool.connection() as conn:
+            conn.executescript(_SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(invoices)")}
+            if "owner" not in columns:  # Stores created before invoices recorded who saved them
+                conn.execute("ALTER TABLE invoices ADD COLUMN owner TEXT")
+
+    # --- Clients ---
+
+    def save_client(self, name, contact):
+        """Creates or updates a client and returns its ID."""
+        name = name.strip()
+        with self.pool.connection() as conn:
+            conn.execute(
+                """
+                INSERT INTO clients (name, name_key, contact, updated_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (name) DO UPDATE SET contact = excluded.contact, updated_at = excluded.updated_at
+                """,
+                (name, normalize(name), contact, _now()),
+            )
+            return conn.execute("SELECT client_id FROM clients WHERE name = ?", (name,)).fetchone()[0]
+
+    def get_client(self, name):
+        """Returns the contact information of a client, or None if unknown."""
+        with self.pool.connection() as conn:
+            row = conn.execute("SELECT contact FROM clients WHERE name = ?", (name,)).fetchone()
+        return row["contact"] if row else None
+
+    def client_names(self, prefix="", limit=TYPEAHEAD_LIMIT):
+        """Returns up to `limit` client names whose normalized form starts with `prefix`, in order."""
+        key = normalize(prefix.strip())
+        with self.pool.connection() as conn:
+            # A half-open range on the indexed key, so the lookup never scans the table
+            rows = conn.execute(
+                "SELECT name FROM clients WHERE name_key >= ? AND name_key < ? ORDER BY name_key LIMIT ?",
+                (key, key + "\U0010ffff", limit),
+            ).fetchall()
+        return [row["name"] for row in rows]
+
+    def client_count(self):
+        """Returns the number of stored clients."""
+        with self.pool.connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM clients").fetchone()[0]
+
+    # --- Invoice IDs ---
+
+    def reserve_ids(self, count=1, sequence=INVOICE_SEQUENCE):
+        """Atomically reserves `count` consecutive numbers of a sequence and returns them as a range.
+
+        A single upsert both reads and advances the counter, so concurrent
+        sessions and processes never receive the same number. Numbers are
+        monotonic but not gapless: reserved numbers that go unused are skipped.
+        """
+        if count < 1:
+            raise ValueError("At least one ID must be reserved.")
+        with self.pool.connection() as conn:
+            end = conn.execute(
+                """
+                INSERT INTO id_sequences (name, next_value) VALUES (?, ?)
+                ON CONFLICT (name) DO UPDATE SET next_value = next_value + excluded.next_value - 1
+                RETURNING next_value
+                """,
+                (sequence, count + 1),
+            ).fetchone()[0]
+        return range(end - count, end)
+
+    def allocate_invoice_id(self, issued_on=None):
+        """Returns a new, unique invoice ID."""
+        return format_invoice_id(self.reserve_ids(1)[0], issued_on)
+
+    def reserve_invoice_ids(self, count, issued_on=None):
+        """Returns `count` unique invoice IDs reserved in one transaction, for batch runs."""
+        return [format_invoice_id(number, issued_on) for number in self.reserve_ids(count)]
+
+    # --- Invoices ---
+
+    def save_invoice(self, invoice_id, company_name, invoice_date, due_date, client_name, client_contact, invoice,
+                     owner=None):
+        """Stores an invoice with its lines.
+
+        An invoice may only be replaced by the owner that saved it (such as
+        the same browser session regenerating its PDF). An ID that is
+        already stored under another owner, or without one, is refused, so
+        a typed or stale ID never overwrites someone else's invoice.
+
+        Args:
+            invoice (InvoiceModel): The line items and totals.
+            owner (str): Token of the session saving the invoice.
+
+        Raises:
+            ValueError: If another owner already stored an invoice with this ID.
+        """
+        with self.pool.connection() as conn:
+            row = conn.execute("SELECT client_id FROM clients WHERE name = ?", (client_name,)).fetchone()
+            # Only the owner's own version is replaced (NULL never matches); any other one makes the insert fail
+            conn.execute("DELETE FROM invoices WHERE invoice_id = ? AND owner = ?", (invoice_id, owner))
+            try:
+                conn.execute(
+                    """
+                    INSERT INTO invoices (invoice_id, client_id, client_name, client_contact, company_name,
+                                          invoice_date, due_date, subtotal_cents, discount_cents, total_cents,
+                                          created_at, owner)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        invoice_id, row[0] if row else None, client_name, client_contact, company_name,
+                        str(invoice_date), str(due_date),
+                        to_cents(invoice.subtotal), to_cents(invoice.discount), to_cents(invoice.total), _now(),
+                        owner,
+                    ),
+                )
+            except sqlite3.IntegrityError:
+                raise ValueError(f"Invoice {invoice_id} was already issued; use a new invoice ID.") from None
+            conn.executemany(
+                """
+                INSERT INTO line_items (invoice_id, position, description, quantity, unit_price_cents, sub_items)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    (invoice_id, position, item.description, item.quantity, to_cents(item.unit_price),
+                     _SUB_ITEM_SEPARATOR.join(item.sub_items))
+                    for position, item in enumerate(invoice)
+                ),
+            )
+
+    def load_invoice(self, invoice_id):
+        """Returns a stored invoice as a dict with an `InvoiceModel` under "products", or None."""
+        with self.pool.connection() as conn:
+            header = conn.execute("SELECT * FROM invoices WHERE invoice_id = ?", (invoice_id,)).fetchone()
+            if header is None:
+                return None
+            lines = conn.execute(
+                "SELECT * FROM line_items WHERE invoice_id = ? ORDER BY position", (invoice_id,)
+            ).fetchall()
+
+        products = InvoiceModel(
+            LineItem(
+                line["description"], line["quantity"], from_cents(line["unit_price_cents"]),
+                line["sub_items"].split(_SUB_ITEM_SEPARATOR) if line["sub_items"] else (),
+            )
+            for line in lines
+        )
+        products.set_discount_amount(from_cents(header["discount_cents"]))
+        invoice = {key: header[key] for key in header.keys() if not key.endswith("_cents")}
+        invoice["products"] = products
+        return invoice
+
+    def recent_invoices(self, limit=20, client_name=None):
+        """Returns the latest invoice headers (ID, client, date, total), newest first."""
+        query = "SELECT invoice_id, client_name, invoice_date, total_cents, created_at FROM invoices"
+        params = []
+        if client_name:
+            query += " WHERE client_id = (SELECT client_id FROM clients WHERE name = ?)"
+            params.append(client_name)
+        query += " ORDER BY created_at DESC LIMIT ?"
+        params.append(limit)
+        with self.pool.connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [
+            {
+                "invoice_id": row["invoice_id"],
+                "client_name": row["client_name"],
+                "invoice_date": row["invoice_date"],
+                "total": from_cents(row["total_cents"]),
+                "created_at": row["created_at"],
+            }
+            for row in rows
+        ]
+
+
+def format_invoice_id(number, issued_on=None):
+    """Formats an invoice number as "INV-<YYYYMMDD>-<number>" (sortable by issue order)."""
+    issued_on = issued_on or datetime.now()
+    return f"INV-{issued_on:%Y%m%d}-{number:06d}"
+
+
+def _now():
+    return datetime.now().isoformat(timespec="seconds")
+
+
+@lru_cache(maxsize=1)
+def get_invoice_store():
+    """Returns the invoice store shared by every session and thread of this process."""
+    return InvoiceStore()
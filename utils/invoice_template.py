@@ -0,0 +1,132 @@
+"""Precompiled static layout shared by every invoice of a company.
+
+The logo, the company block, the separator line and the product table header
+look the same on every invoice of a given company/logo. An `InvoiceTemplate`
+does the expensive work for them once: it decodes and compresses the logo and
+shapes the fixed text. Each document then replays a few drawing calls and
+reuses the logo stream that is already encoded.
+"""
+import copy
+import os
+import threading
+from collections import OrderedDict
+
+from fpdf.image_datastructures import ImageCache
+from fpdf.image_parsing import preload_image
+
+from utils.arabic_text import COMPANY_DETAILS, TABLE_HEADERS, shape_text
+from utils.logo_cache import LOGO_HASH_KEY
+
+# Static layout coordinates (mm)
+LOGO_X = 10
+LOGO_Y = 2
+LOGO_WIDTH = 45
+SEPARATOR_Y = 71  # Below the invoice metadata and client block
+TABLE_TOP = 76
+TABLE_WIDTHS = [35, 35, 30, 90]  # Column widths, RTL order
+
+# Number of company/logo templates kept in memory
+MAX_TEMPLATES = 16
+
+_templates = OrderedDict()  # (company name, logo key) -> InvoiceTemplate
+_lock = threading.Lock()
+
+
+class InvoiceTemplate:
+    """Static invoice background and table header for one company and logo."""
+
+    def __init__(self, company_name, logo_path=None):
+        self.company_name = company_name
+        self.company_line = shape_text(company_name)
+        self.logo = _encode_logo(logo_path) if logo_path else None
+
+    def draw_header(self, pdf):
+        """Draws the logo and the company block (left-aligned, below the logo)."""
+        if self.logo:
+            _embed_logo(pdf, self.logo)
+
+        current_y = LOGO_Y + LOGO_WIDTH / 2 + 18  # Logo height assumed to be equal to width
+
+        pdf.set_font("Amiri", "B", 18)
+        pdf.set_text_color(0)
+        pdf.set_xy(LOGO_X, current_y)
+        pdf.cell(0, 10, self.company_line, ln=1, align="L")
+
+        current_y += 10  # Add space between company name and next line
+        pdf.set_font("Amiri", "", 12)
+        pdf.set_xy(LOGO_X, current_y)
+        pdf.multi_cell(0, 8, COMPANY_DETAILS, align="L")
+
+    def draw_table_header(self, pdf):
+        """Draws the divider line and the RTL product table header."""
+        pdf.set_draw_color(200)
+        pdf.line(10, SEPARATOR_Y, pdf.w - 10, SEPARATOR_Y)
+        pdf.set_xy(pdf.l_margin, TABLE_TOP)
+        pdf.set_text_color(0)
+        self.draw_column_headers(pdf)
+
+    def draw_column_headers(self, pdf):
+        """Draws the RTL column header row at the current position (repeated on every table page)."""
+        pdf.set_font('Amiri', 'B', 12)
+        for width, header in zip(TABLE_WIDTHS, TABLE_HEADERS):
+            pdf.cell(width, 10, header, 1, 0, "C")
+        pdf.ln()
+
+
+def get_invoice_template(company_name, logo_path=None):
+    """Returns the cached template for a company/logo, rebuilding it if the logo changed.
+
+    `logo_path` may be a file path or an image returned by `utils.logo_cache.load_logo`.
+    """
+    key = (company_name, _logo_key(logo_path))
+    with _lock:
+        template = _templates.get(key)
+        if template is not None:
+            _templates.move_to_end(key)
+            return template
+
+    template = InvoiceTemplate(company_name, logo_path)
+    with _lock:
+        _templates[key] = template
+        while len(_templates) > MAX_TEMPLATES:
+            _templates.popitem(last=False)
+    return template
+
+
+def _logo_key(logo_path):
+    """Identifies a logo by path and file signature, or by content hash for in-memory images."""
+    if logo_path is None:
+        return None
+    if isinstance(logo_path, str):
+        if not os.path.exists(logo_path):
+            return (logo_path, None)
+        stat = os.stat(logo_path)
+        return (logo_path, stat.st_mtime_ns, stat.st_size)
+    info = getattr(logo_path, 'info', None) or {}
+    return info.get(LOGO_HASH_KEY, id(logo_path))
+
+
+def _encode_logo(logo_path):
+    """Decodes and compresses the logo once, in a scratch image cache."""
+    scratch = ImageCache()
+    try:
+        name, _, info = preload_image(scratch, logo_path)
+    except Exception as e:
+        print(f"Error adding logo: {e}")  # Or log the error
+        return None
+    iccp = next((profile for profile, i in scratch.icc_profiles.items() if i == info["iccp_i"]), None)
+    return name, info, iccp
+
+
+def _embed_logo(pdf, logo):
+    """Places the pre-encoded logo, registering it in the document's image cache first."""
+    name, info, iccp = logo
+    image_cache = pdf.image_cache
+    if name not in image_cache.images:
+        info = copy.copy(info)
+        info["i"] = len(image_cache.images) + 1
+        info["usages"] = 0
+        if iccp is not None:
+            info["iccp_i"] = image_cache.icc_profiles.setdefault(iccp, len(image_cache.icc_profiles))
+        image_cache.images[name] = info
+    pdf.image(name, x=LOGO_X, y=LOGO_Y, w=LOGO_WIDTH)
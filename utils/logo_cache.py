@@ -0,0 +1,75 @@
+"""In-memory cache of decoded company logos, keyed by content hash.
+
+The same decoded image feeds both the sidebar preview and FPDF, so a logo is
+decoded and downscaled once per distinct file content, and nothing is written
+to disk.
+"""
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+from PIL import Image
+
+# Longest side of the cached logo in pixels (~340 dpi at the 45 mm printed width)
+LOGO_MAX_SIZE = 600
+# Number of distinct logos kept in memory
+MAX_LOGOS = 32
+# Key under which the content hash is stored in the cached image's `info`
+LOGO_HASH_KEY = "content_sha256"
+
+_logos = OrderedDict()  # content hash -> PIL image
+_path_hashes = OrderedDict()  # (path, mtime_ns, size) -> content hash, at most MAX_LOGOS entries
+_lock = threading.Lock()  # Guards both maps
+
+
+def load_logo(source):
+    """Returns the decoded, downscaled logo for an uploaded file or a path.
+
+    Args:
+        source: A Streamlit `UploadedFile` (or any object with `getvalue()`)
+            or a path to an image file.
+
+    Returns:
+        PIL.Image.Image: The cached image. Callers must not modify it.
+    """
+    data = None
+    if isinstance(source, str):
+        stat = os.stat(source)
+        path_key = (source, stat.st_mtime_ns, stat.st_size)
+        with _lock:
+            digest = _path_hashes.get(path_key)
+            if digest is not None:
+                _path_hashes.move_to_end(path_key)
+        if digest is None:
+            with open(source, 'rb') as f:
+                data = f.read()
+            digest = hashlib.sha256(data).hexdigest()
+            with _lock:
+                _path_hashes[path_key] = digest
+                while len(_path_hashes) > MAX_LOGOS:
+                    _path_hashes.popitem(last=False)
+    else:
+        data = source.getvalue()
+        digest = hashlib.sha256(data).hexdigest()
+
+    with _lock:
+        image = _logos.get(digest)
+        if image is not None:
+            _logos.move_to_end(digest)
+            return image
+
+    if data is None:
+        with open(source, 'rb') as f:
+            data = f.read()
+    image = Image.open(io.BytesIO(data))
+    image.thumbnail((LOGO_MAX_SIZE, LOGO_MAX_SIZE))
+    image.load()
+    image.info[LOGO_HASH_KEY] = digest
+
+    with _lock:
+        _logos[digest] = image
+        while len(_logos) > MAX_LOGOS:
+            _logos.popitem(last=False)
+    return image
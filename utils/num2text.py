@@ -1,166 +1,196 @@
-import streamlit as st
-# Function to convert numbers to Arabic words with correct grammar
+"""Arabic number-to-words conversion for Libyan dinar amounts (tafqeet).
+
+The words of 0-999 and the phrase of every three-digit group for thousands,
+millions and billions are built once at import. Converting a number is then
+a few table lookups per group instead of recursion over rebuilt dictionaries.
+The module has no third-party imports at load time (numpy is loaded by the
+batch converter on first use), so workers and CLIs can import it cheaply.
+Counted nouns follow Arabic number grammar:
+- 1 and 2 use the singular and dual forms (ألف، ألفان، دينار واحد، ديناران).
+- When the last two digits are 3 to 10, the noun is plural (آلاف، دنانير).
+- When they are 11 to 99, it is accusative singular (ألفاً، ديناراً).
+- Otherwise it is singular (مئة ألف، مئة دينار).
+"""
+from decimal import ROUND_HALF_UP, Decimal
+from functools import lru_cache
+
+
+# Largest whole number the converter handles
+MAX_NUMBER = 10**12 - 1
+# Milliemes per dinar
+MILLIEMES_PER_DINAR = 1000
+# Distinct amounts kept by the conversion cache
+AMOUNT_CACHE_SIZE = 8192
+
+INVALID_NEGATIVE = "عدد سالب غير صالح"  # Invalid negative number
+PREFIX = "فقط"
+SUFFIX = "لا غير"
+
+_UNITS = ["صفر", "واحد", "اثنان", "ثلاثة", "أربعة", "خمسة", "ستة", "سبعة", "ثمانية", "تسعة", "عشرة",
+          "أحد عشر", "اثنا عشر", "ثلاثة عشر", "أربعة عشر", "خمسة عشر", "ستة عشر", "سبعة عشر",
+          "ثمانية عشر", "تسعة عشر"]
+_TENS = ["", "", "عشرون", "ثلاثون", "أربعون", "خمسون", "ستون", "سبعون", "ثمانون", "تسعون"]
+_HUNDREDS = ["", "مئة", "مئتان", "ثلاثمئة", "أربعمئة", "خمسمئة", "ستمئة", "سبعمئة", "ثمانمئة", "تسعمئة"]
+
+# Counted-noun forms: (singular, dual, plural, accusative singular)
+THOUSAND = ("ألف", "ألفان", "آلاف", "ألفاً")
+MILLION = ("مليون", "مليونان", "ملايين", "مليوناً")
+BILLION = ("مليار", "ملياران", "مليارات", "ملياراً")
+DINAR = ("دينار", "ديناران", "دنانير", "ديناراً")
+MILLIEME = ("مليم", "مليمان", "مليمات", "مليماً")
+
+
+def _below_thousand(n):
+    if n < 20:
+        return _UNITS[n]
+    if n < 100:
+        tens, units = divmod(n, 10)
+        return f"{_UNITS[units]} و{_TENS[tens]}" if units else _TENS[tens]
+    hundreds, rest = divmod(n, 100)
+    return f"{_HUNDREDS[hundreds]} و{_below_thousand(rest)}" if rest else _HUNDREDS[hundreds]
+
+
+# Words of 0-999, built once
+WORDS = tuple(_below_thousand(n) for n in range(1000))
+
+
+def _counted(n, forms, one=None, words=None):
+    """Returns `n` followed by its counted noun in the grammatical form `n` requires."""
+    singular, dual, plural, accusative = forms
+    if n == 1:
+        return one if one is not None else singular
+    if n == 2:
+        return dual
+    words = words if words is not None else WORDS[n]
+    last_two = n % 100
+    if 3 <= last_two <= 10:
+        return f"{words} {plural}"
+    if 11 <= last_two <= 99:
+        return f"{words} {accusative}"
+    return f"{words} {singular}"
+
+
+# Phrase of every non-zero three-digit group, per scale (units, thousands, millions, billions)
+_GROUPS = (
+    WORDS,
+    ("",) + tuple(_counted(n, THOUSAND) for n in range(1, 1000)),
+    ("",) + tuple(_counted(n, MILLION) for n in range(1, 1000)),
+    ("",) + tuple(_counted(n, BILLION) for n in range(1, 1000)),
+)
+
+
+def number_to_words(n):
+    """Returns the Arabic words of a whole number from 0 to `MAX_NUMBER`."""
+    n = int(n)
+    if n < 0:
+        raise ValueError("Negative numbers have no word form.")
+    if n > MAX_NUMBER:
+        raise ValueError(f"Numbers above {MAX_NUMBER} are not supported.")
+    if n < 1000:
+        return WORDS[n]
+    parts = []
+    scale = 0
+    while n:
+        n, group = divmod(n, 1000)
+        if group:
+            parts.append(_GROUPS[scale][group])
+        scale += 1
+    return " و".join(reversed(parts))
+
+
+def count_words(n, forms, one=None):
+    """Returns a counted phrase such as "ثلاثة دنانير" or "أحد عشر ديناراً" for a whole number."""
+    if n < 3:
+        return _counted(n, forms, one)
+    return _counted(n, forms, one, number_to_words(n))
+
+
+def to_milliemes(amount):
+    """Converts a dinar amount to whole milliemes, rounding half up."""
+    if not isinstance(amount, Decimal):
+        amount = Decimal(str(amount))
+    return int((amount * MILLIEMES_PER_DINAR).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+@lru_cache(maxsize=AMOUNT_CACHE_SIZE)
+def milliemes_to_words(milliemes):
+    """Returns the tafqeet of an amount given in milliemes: "فقط ... لا غير"."""
+    if milliemes < 0:
+        return INVALID_NEGATIVE
+    if milliemes == 0:
+        return f"{PREFIX} صفر {DINAR[0]} {SUFFIX}"
+    dinars, rest = divmod(milliemes, MILLIEMES_PER_DINAR)
+    parts = []
+    if dinars:
+        parts.append(count_words(dinars, DINAR, one=f"{DINAR[0]} واحد"))
+    if rest:
+        parts.append(count_words(rest, MILLIEME, one=f"{MILLIEME[0]} واحد"))
+    return f"{PREFIX} {' و'.join(parts)} {SUFFIX}"
+
+
+def amount_to_words(amount):
+    """Returns the Libyan-dinar tafqeet of an amount, e.g. 1500.25 -> "فقط ألف وخمسمئة دينار ومئتان وخمسون مليماً لا غير"."""
+    return milliemes_to_words(to_milliemes(amount))
+
+
+def amounts_to_words(amounts):
+    """Converts a sequence or array of amounts at once, converting each distinct amount only once.
+
+    Float inputs are scaled and rounded to milliemes as one vectorized
+    operation; Decimal and other exact inputs are converted exactly.
+    """
+    import numpy as np  # Imported on first use to keep this module light for workers and CLIs
+
+    values = np.asarray(amounts)
+    if values.size == 0:
+        return []
+    if values.dtype.kind in "iuf":
+        # Rounding to 6 places first removes binary noise (1.0005 * 1000 = 1000.4999...) before rounding half up
+        scaled = np.round(values.astype(np.float64) * MILLIEMES_PER_DINAR, 6)
+        milliemes = np.floor(scaled + 0.5).astype(np.int64)
+    else:
+        milliemes = np.fromiter((to_milliemes(amount) for amount in values.ravel()), dtype=np.int64, count=values.size)
+    uniques, inverse = np.unique(milliemes.ravel(), return_inverse=True)
+    words = [milliemes_to_words(int(value)) for value in uniques]
+    return [words[i] for i in inverse]
+
+
+# Earlier names of the converter, kept for existing callers
 def number_to_arabic_words(num):
+    """Converts a whole number to Arabic words."""
     if num < 0:
-        return "عدد سالب غير صالح"  # Invalid negative number
-    arabic_numbers = {
-        0: "صفر", 1: "واحد", 2: "اثنان", 3: "ثلاثة", 4: "أربعة",
-        5: "خمسة", 6: "ستة", 7: "سبعة", 8: "ثمانية", 9: "تسعة",
-        10: "عشرة", 11: "أحد عشر", 12: "اثنا عشر", 20: "عشرون",
-        30: "ثلاثون", 40: "أربعون", 50: "خمسون", 60: "ستون",
-        70: "سبعون", 80: "ثمانون", 90: "تسعون", 100: "مئة",
-        200: "مئتان", 300: "ثلاثمئة", 400: "أربعمئة", 500: "خمسمئة",
-        600: "ستمئة", 700: "سبعمئة", 800: "ثمانمئة", 900: "تسعمئة",
-        1000: "ألف", 2000: "ألفان", 1000000: "مليون"
-    }
-    if num in arabic_numbers:
-        return arabic_numbers[num]
-    parts = []
-    if num < 100:
-        tens = (num // 10) * 10
-        units = num % 10
-        if units == 0:
-            parts.append(arabic_numbers[tens])
-        else:
-            parts.append(arabic_numbers[units])
-            parts.append("و")
-            parts.append(arabic_numbers[tens])
-    elif num < 1000:
-        hundreds = (num // 100) * 100
-        remainder = num % 100
-        parts.append(arabic_numbers[hundreds])
-        if remainder > 0:
-            parts.append("و")
-            parts.append(number_to_arabic_words(remainder))
-    elif num < 1000000:
-        thousands = num // 1000
-        remainder = num % 1000
-        if thousands == 1:
-            parts.append("ألف")
-        elif thousands == 2:
-            parts.append("ألفان")
-        elif 3 <= thousands <= 10:
-            parts.append(number_to_arabic_words(thousands))
-            parts.append("آلاف")
-        else:
-            parts.append(number_to_arabic_words(thousands))
-            parts.append("ألف")
-        
-        if remainder > 0:
-            parts.append("و")
-            parts.append(number_to_arabic_words(remainder))
-    elif num == 1000000:
-        return "مليون"
-    return " ".join(parts)
-# Function to format the amount in Libyan Dinar with prefix and suffix, including decimals for milliemes
+        return INVALID_NEGATIVE
+    return number_to_words(num)
+
+
 def format_currency(amount):
-    if amount < 0:
-        return "عدد سالب غير صالح"  # Invalid negative number
-    if amount == 0:
-        return "فقط صفر دينار لا غير"
-    dinars = int(amount)  # Whole number part in Dinars
-    milliemes = int(round((amount - dinars) * 1000))  # Decimal part in milliemes
-    parts = []
-    # Convert dinars part
-    if dinars > 0:
-        if dinars == 1:
-            parts.append("دينار واحد")
-        elif dinars == 2:
-            parts.append("ديناران")
-        elif 3 <= dinars <= 10:
-            parts.append(number_to_arabic_words(dinars))
-            parts.append("دنانير")
-        else:
-            parts.append(number_to_arabic_words(dinars))
-            parts.append("دينار")
-    # Convert milliemes part
-    if milliemes > 0:
-        if dinars > 0:
-            parts.append("و")  # Add "و" only if dinars part is present
-        if milliemes == 1:
-            parts.append("مليم واحد")
-        elif milliemes == 2:
-            parts.append("مليمان")
-        elif 3 <= milliemes <= 10:
-            parts.append(number_to_arabic_words(milliemes))
-            parts.append("ملليمات")
-        else:
-            parts.append(number_to_arabic_words(milliemes))
-            parts.append("مليم")
-    # Join the parts with prefix and suffix
-    result = "فقط " + " ".join(parts) + " لا غير"
-    return result
-# Streamlit UI
-st.title("تحويل الأرقام إلى كلمات عربية - الدينار الليبي")
-# Input from user
-user_input = st.text_input("أدخل المبلغ (بالدينار، على سبيل المثال: 1500.250):")
-# Validate input
-if user_input:
-    try:
-        amount = float(user_input)  # Accept decimal input
-        if amount >= 0:
-            arabic_words = format_currency(amount)  # Treat the input as Dinars
-            st.success(f"المبلغ {amount} يُكتب كـ: {arabic_words}")
-        else:
-            st.error("يرجى إدخال مبلغ غير سالب.")
-    except ValueError:
-        st.error("يرجى إدخال رقم صحيح.")
+    """Formats an amount in Libyan dinars and milliemes as Arabic words."""
+    return amount_to_words(amount)
+
+
 class Num2Word_AR:
-    def __init__(self):
-        self.high_numwords = ["", "ألف", "مليون", "مليار", "بليون", "كوادريليون", "كوينتليون"]
-        self.mid_numwords = [(100, "مائة", "مائتان", "مئات"),
-                             (10, "عشرة", "عشرون", "عشرات"),
-                             (1, "واحد", "إثنان", "")]
-        self.errmsg_nonnum = "المدخلات يجب ان تكون رقمية فقط."
-        self.cards = ["صفر", "واحد", "إثنان", "ثلاثة", "أربعة", "خمسة",
-                      "ستة", "سبعة", "ثمانية", "تسعة", "عشرة",
-                      "إحدى عشر", "اثنا عشر", "ثلاثة عشر", "أربعة عشر",
-                      "خمسة عشر", "ستة عشر", "سبعة عشر", "ثمانية عشر", "تسعة عشر"]
-        
+    """Converter interface of the num2words package, backed by the shared word tables."""
+
+    errmsg_nonnum = "المدخلات يجب ان تكون رقمية فقط."
+
     def to_cardinal(self, value):
         if not isinstance(value, int):
             return self.errmsg_nonnum
-        
-        if value < 20:
-            return self.cards[value]
-        
-        words = []
-        for scale, inc in enumerate(self.high_numwords):
-            if value == 0:
-                break
-            value, rnum = divmod(value, 1000)
-            if rnum > 0:
-                words.append(self.merge(rnum) + " " + self.high_numwords[scale])
-        return " و ".join(reversed(words)).strip()
-    
-    def merge(self, value):
-        words = []
-        for scale, forms in self.mid_numwords:
-            lnum, rnum = divmod(value, scale)
-            if lnum == 0:
-                continue
-            if lnum == 1:
-                word = forms[1]
-            elif lnum == 2:
-                word = forms[2]
-            else:
-                word = self.cards[lnum] + " " + forms[3]
-            words.append(word)
-            value = rnum
-        return " و ".join(words)
-    
+        return number_to_words(value)
+
     def to_ordinal(self, value):
         # Example of ordinal conversion
         cardinal = self.to_cardinal(value)
         if cardinal == "واحد":
             return "الأول"
-        elif cardinal == "إثنان":
+        elif cardinal == "اثنان":
             return "الثاني"
         # This example is simplified; expand as needed
         return f"{cardinal}th"
-    
+
     def to_ordinal_num(self, value):
         return f"{value}."
+
     def to_currency(self, val, currency="دينار", cents="درهم"):
         dinars, dirhams = divmod(val, 100)
         parts = []
@@ -1,30 +1,43 @@
 from fpdf import FPDF
-import streamlit as st
-from bidi.algorithm import get_display
-from arabic_reshaper import reshape
 from fpdf.enums import XPos, YPos
 
+from utils.arabic_text import (
+    AMOUNT_IN_WORDS_LABEL, CLIENT_HEADING, DISCOUNT_LABEL, PAGE_SUBTOTAL_LABEL, SUBTOTAL_LABEL, TOTAL_LABEL,
+    shape_many, shape_text,
+)
+from utils.font_cache import add_cached_font, get_parsed_font
+from utils.invoice_model import as_line_item
+from utils.invoice_template import TABLE_WIDTHS, get_invoice_template
+from utils.num2text import amount_to_words, amounts_to_words
+
+# Amiri font files registered on every invoice, keyed by FPDF style
+FONT_FILES = {
+    '': 'assets/fonts/Amiri-Regular.ttf',
+    'B': 'assets/fonts/Amiri-Bold.ttf',
+}
+
+# Table row heights and the space kept free above the page footer (mm)
+ROW_HEIGHT = 10
+SUB_ITEM_HEIGHT = 8
+# Vertical gaps after a product row and after its block of sub-items (mm)
+ROW_GAP = 1
+SUB_ITEMS_GAP = 10
+SUMMARY_HEIGHT = 50
+CONTENT_BOTTOM_MARGIN = 25
+
+# Chunk size used when copying a finished PDF into a buffer
+PDF_CHUNK_SIZE = 64 * 1024
+
+
 def generate_pdf(invoice_id, company_name, logo_path, date, due_date, client_name, client_contact, products, subtotal, discount, total):
     """Generates a visually refined PDF invoice with Arabic support."""
-    gray_color = 150
     try:
         _log_status("بدء إنشاء ملف PDF...")
 
-        # Initialize PDF and configure fonts
-        pdf = _initialize_pdf()
-        _register_fonts(pdf)
-
-        # Add company logo, header, invoice metadata, and client information
-        _add_invoice_details(pdf, logo_path, company_name, invoice_id, date, due_date, client_name, client_contact, gray_color)
-
-        # Add product table
-        _add_product_table(pdf, products)
-
-        # Add summary section
-        _add_summary(pdf, subtotal, discount, total)
-
-        # Add footer with page number
-        _add_footer(pdf)
+        pdf = build_invoice_pdf(
+            invoice_id, company_name, logo_path, date, due_date,
+            client_name, client_contact, products, subtotal, discount, total
+        )
 
         # Generate and return PDF
         pdf_output = f"{invoice_id}.pdf"
@@ -34,67 +47,234 @@ def generate_pdf(invoice_id, company_name, logo_path, date, due_date, client_nam
         return pdf_output
 
     except Exception as e:
-        st.error(f"حدث خطأ أثناء إنشاء ملف PDF: {e}")
+        _show_error(f"حدث خطأ أثناء إنشاء ملف PDF: {e}")
+        _log_status(f"خطأ في إنشاء ملف PDF: {e}")
+        return None
+
+
+def generate_pdf_bytes(invoice_id, company_name, logo_path, date, due_date, client_name, client_contact, products, subtotal, discount, total):
+    """Generates the PDF invoice in memory and returns its bytes, or None on error."""
+    try:
+        pdf = build_invoice_pdf(
+            invoice_id, company_name, logo_path, date, due_date,
+            client_name, client_contact, products, subtotal, discount, total
+        )
+        return bytes(pdf.output())
+
+    except Exception as e:
+        _show_error(f"حدث خطأ أثناء إنشاء ملف PDF: {e}")
         _log_status(f"خطأ في إنشاء ملف PDF: {e}")
         return None
 
 
+def write_pdf_chunks(pdf, stream, chunk_size=PDF_CHUNK_SIZE):
+    """Copies a finished FPDF document into any writable binary buffer in chunks.
+
+    This does not lower peak memory: fpdf2 renders the whole document into
+    one in-memory buffer, which is then written out `chunk_size` bytes at a
+    time without further copies.
+
+    Returns the number of bytes written.
+    """
+    data = memoryview(pdf.output())
+    for start in range(0, len(data), chunk_size):
+        stream.write(data[start:start + chunk_size])
+    return len(data)
+
+
+def format_summaries(amounts):
+    """Formats and shapes the summary strings of many invoices in one pass.
+
+    The totals of the whole batch are converted to words together (each
+    distinct total once), and the resulting lines are reshaped together, so
+    rendering an invoice only draws ready-made strings.
+
+    Args:
+        amounts (iterable): (subtotal, discount, total) of each invoice.
+
+    Returns:
+        list: One dict per invoice with the printed "subtotal", "discount" and
+        "total" amounts and the shaped amount-in-words line under "words"
+        (None when the total is negative or too large to be written out).
+    """
+    amounts = list(amounts)
+    words = _amounts_in_words([total for _, _, total in amounts])
+    shaped = iter(shape_many([f"{AMOUNT_IN_WORDS_LABEL} {text}" for text in words if text is not None]))
+    return [
+        {
+            "subtotal": f"${subtotal:.2f}",
+            "discount": f"${-discount:.2f}",
+            "total": f"${total:.2f}",
+            "words": next(shaped) if text is not None else None,
+        }
+        for (subtotal, discount, total), text in zip(amounts, words)
+    ]
+
+
+def _amounts_in_words(totals):
+    """Returns the words of each total, or None for a negative total or one beyond the converter's range."""
+    try:
+        words = amounts_to_words(totals)
+    except ValueError:
+        # One total is out of range: convert them one by one so only that invoice loses its line
+        words = []
+        for total in totals:
+            try:
+                words.append(amount_to_words(total))
+            except ValueError:
+                words.append(None)
+    return [text if total >= 0 else None for total, text in zip(totals, words)]
+
+
+def format_summary(subtotal, discount, total):
+    """Returns the printed summary strings of one invoice (see `format_summaries`)."""
+    return format_summaries([(subtotal, discount, total)])[0]
+
+
+def build_invoice_pdf(invoice_id, company_name, logo_path, date, due_date, client_name, client_contact, products, subtotal, discount, total, template=None, summary=None):
+    """Lays out a complete invoice and returns the FPDF document without writing it.
+
+    Unlike `generate_pdf`, errors are raised to the caller, which lets batch
+    jobs record the failure and carry on with the next invoice. The static
+    background comes from `template`, or from the cached template of the
+    company/logo when none is given. `summary` takes the strings prepared by
+    `format_summaries`; they are formatted here when it is not given.
+    """
+    gray_color = 150
+    if template is None:
+        template = get_invoice_template(company_name, logo_path)
+
+    # Initialize PDF and configure fonts
+    pdf = _initialize_pdf()
+    _register_fonts(pdf)
+
+    # Static background: company logo and header
+    template.draw_header(pdf)
+
+    # Overlay invoice metadata and client information
+    _add_invoice_details(pdf, invoice_id, date, due_date, client_name, client_contact, gray_color)
+
+    # Static table header, then the product rows (the footer is stamped on every page)
+    template.draw_table_header(pdf)
+    _add_product_table(pdf, products, template)
+
+    # Add summary section
+    _add_summary(pdf, summary or format_summary(subtotal, discount, total))
+
+    return pdf
+
+
+class InvoicePDF(FPDF):
+    """FPDF document that stamps "page X of Y" at the bottom of every page."""
+
+    def footer(self):
+        self.set_y(-20)
+        self.set_font('Amiri', '', 10)
+        # Visual (LTR) order: the total-pages alias sits left of the shaped "page X of"
+        self.cell(0, 10, f"{self.str_alias_nb_pages} {_reshape_text(f'الصفحة {self.page_no()} من')}", align='C')
+
+
 def _initialize_pdf():
     """Creates and configures a new PDF instance."""
-    pdf = FPDF()
+    pdf = InvoicePDF()
     pdf.add_page()
-    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf.set_auto_page_break(auto=True, margin=CONTENT_BOTTOM_MARGIN)
     pdf.set_text_color(90)  # Default text color
     return pdf
 
 
+def preload_fonts():
+    """Parses the Amiri fonts into the process-wide font cache ahead of the first invoice."""
+    for style, path in FONT_FILES.items():
+        get_parsed_font('Amiri', style, path)
+
+
 def _register_fonts(pdf):
     """Registers Arabic-compatible fonts."""
-    pdf.add_font('Amiri', '', 'assets/fonts/Amiri-Regular.ttf', uni=True)
-    pdf.add_font('Amiri', 'B', 'assets/fonts/Amiri-Bold.ttf', uni=True)
+    for style, path in FONT_FILES.items():
+        add_cached_font(pdf, 'Amiri', style, path)
 
 
-def _add_product_table(pdf, products):
-    """Adds a mirrored product table for RTL layout with refined sub-item formatting."""
-    
-    # Set font for headers
-    pdf.set_font('Amiri', 'B', 12)
-
-    # Define headers in reverse order for RTL
-    headers = [_reshape_text(header) for header in ["الإجمالي", "سعر الوحدة", "الكمية", "الوصف"]]
-    widths = [35, 35, 30, 90]  # Define column widths
+def _add_product_table(pdf, products, template):
+    """Streams the mirrored product rows for RTL layout with refined sub-item formatting.
 
-    # Add table headers (RTL order)
-    for i, header in enumerate(headers):
-        pdf.cell(widths[i], 10, header, 1, 0, "C")
-    pdf.ln()
+    `products` may be any iterable of `LineItem`s (such as an `InvoiceModel`)
+    or product dicts, including a generator: rows are drawn as they arrive,
+    so the table itself holds no more than one row at a time.
+    Pages are broken explicitly; each full page is closed with its subtotal
+    and the next one starts with the repeated table header.
+    """
+    widths = TABLE_WIDTHS
+    page_subtotal = 0
+    multi_page = False
 
     # Set font for product details
     pdf.set_font('Amiri', '', 12)
 
     # Add product rows
     for product in products:
+        product = as_line_item(product)
+        if _needs_page_break(pdf, ROW_HEIGHT + ROW_GAP):
+            _break_table_page(pdf, template, page_subtotal)
+            page_subtotal, multi_page = 0, True
         pdf.set_fill_color(255)  # White background for product rows
 
         # Main product row in RTL (mirrored layout)
-        pdf.cell(widths[0], 10, f"${product['Total']:.2f}", 1, 0, "R", fill=True)
-        pdf.cell(widths[1], 10, f"${product['Unit Price']:.2f}", 1, 0, "R", fill=True)
-        pdf.cell(widths[2], 10, str(product["Quantity"]), 1, 0, "C", fill=True)
-        pdf.cell(widths[3], 10, _reshape_text(product["Description"]), 1, 1, "R", fill=True)
-        pdf.ln(1)
+        pdf.cell(widths[0], ROW_HEIGHT, f"${product.total:.2f}", 1, 0, "R", fill=True)
+        pdf.cell(widths[1], ROW_HEIGHT, f"${product.unit_price:.2f}", 1, 0, "R", fill=True)
+        pdf.cell(widths[2], ROW_HEIGHT, str(product.quantity), 1, 0, "C", fill=True)
+        pdf.cell(widths[3], ROW_HEIGHT, _reshape_text(product.description), 1, 1, "R", fill=True)
+        page_subtotal += product.total
+        pdf.ln(ROW_GAP)
         # Sub-items (if any)
-        if "Sub-items" in product and product["Sub-items"]:
+        if product.sub_items:
             pdf.set_font('Amiri', '', 10)  # Smaller font for sub-items
             pdf.set_fill_color(250)  # Subtle background for sub-items
-            for sub_item in product["Sub-items"]:
+            last = len(product.sub_items) - 1
+            for i, sub_item in enumerate(product.sub_items):
+                # The gap after the last sub-item must fit above the page subtotal too
+                if _needs_page_break(pdf, SUB_ITEM_HEIGHT + (SUB_ITEMS_GAP if i == last else 0)):
+                    _break_table_page(pdf, template, page_subtotal)
+                    page_subtotal, multi_page = 0, True
+                    pdf.set_font('Amiri', '', 10)
+                    pdf.set_fill_color(250)
                 pdf.cell(10)  # Indent sub-item
-                pdf.cell(180, 8, _reshape_text(f"- {sub_item}"), ln=True, align="R", border=0, fill=True)
+                pdf.cell(180, SUB_ITEM_HEIGHT, _reshape_text(f"- {sub_item}"), ln=True, align="R", border=0, fill=True)
             pdf.set_font('Amiri', '', 12)  # Reset to regular font size
-            pdf.ln(10)
+            pdf.ln(SUB_ITEMS_GAP)
+
+    if multi_page:
+        _add_page_subtotal(pdf, page_subtotal)
+
+
+def _needs_page_break(pdf, height):
+    """Tells whether `height` more mm (content plus the gap after it) would push the page subtotal into the footer area."""
+    return pdf.get_y() + height + ROW_HEIGHT > pdf.h - CONTENT_BOTTOM_MARGIN
 
 
-def _add_summary(pdf, subtotal, discount, total):
-    """Adds a summary section as a small table on the left side of the page."""
+def _break_table_page(pdf, template, page_subtotal):
+    """Closes the current page with its subtotal and repeats the table header on a new page."""
+    _add_page_subtotal(pdf, page_subtotal)
+    pdf.add_page()
+    template.draw_column_headers(pdf)
+    pdf.set_font('Amiri', '', 12)
+
+
+def _add_page_subtotal(pdf, page_subtotal):
+    """Adds the subtotal row of the lines that started on the current page."""
+    pdf.set_font('Amiri', 'B', 12)
+    pdf.set_x(pdf.l_margin)
+    pdf.cell(TABLE_WIDTHS[0], ROW_HEIGHT, f"${page_subtotal:.2f}", 1, 0, "R")
+    pdf.cell(sum(TABLE_WIDTHS[1:]), ROW_HEIGHT, PAGE_SUBTOTAL_LABEL, 1, 1, "R")
+    pdf.set_font('Amiri', '', 12)
+
+
+def _add_summary(pdf, summary):
+    """Adds a summary section as a small table on the left side of the page, then the amount in words."""
+    # Keep the summary table in one piece
+    if pdf.get_y() + SUMMARY_HEIGHT > pdf.h - CONTENT_BOTTOM_MARGIN:
+        pdf.add_page()
+
     pdf.set_font('Amiri', 'B', 14)
 
     # Set table position
@@ -106,26 +286,29 @@ def _add_summary(pdf, subtotal, discount, total):
     row_height = 10
 
     # Draw the table rows with swapped columns
-    pdf.cell(col1_width, row_height, f"${subtotal:.2f}", 1, 0, "L")  # Numeric value in the first column
-    pdf.cell(col2_width, row_height, _reshape_text("الإجمالي الفرعي:"), 1, 1, "R")  # Label in the second column
-
-    pdf.cell(col1_width, row_height, f"${-discount:.2f}", 1, 0, "L")
-    pdf.cell(col2_width, row_height, _reshape_text("الخصم:"), 1, 1, "R")
+    pdf.cell(col1_width, row_height, summary["subtotal"], 1, 0, "L")  # Numeric value in the first column
+    pdf.cell(col2_width, row_height, SUBTOTAL_LABEL, 1, 1, "R")  # Label in the second column
 
-    pdf.cell(col1_width, row_height, f"${total:.2f}", 1, 0, "L")
-    pdf.cell(col2_width, row_height, _reshape_text("الإجمالي:"), 1, 1, "R")
+    pdf.cell(col1_width, row_height, summary["discount"], 1, 0, "L")
+    pdf.cell(col2_width, row_height, DISCOUNT_LABEL, 1, 1, "R")
 
+    pdf.cell(col1_width, row_height, summary["total"], 1, 0, "L")
+    pdf.cell(col2_width, row_height, TOTAL_LABEL, 1, 1, "R")
 
-def _add_footer(pdf):
-    """Adds a footer with the page number."""
-    pdf.set_y(-20)
-    pdf.set_font('Amiri', '', 10)
-    pdf.cell(0, 10, _reshape_text(f"الصفحة {pdf.page_no()}"), align='C')
+    # Amount in words across the page width, right-aligned for RTL
+    if summary["words"]:
+        pdf.set_font('Amiri', '', 12)
+        width = pdf.get_string_width(summary["words"])
+        if width > pdf.epw:  # Amounts in the billions: shrink the line to fit on one row
+            pdf.set_font_size(12 * pdf.epw / width)
+        pdf.ln(2)
+        pdf.set_x(pdf.l_margin)
+        pdf.cell(0, row_height, summary["words"], 0, 1, "R")
 
 
 def _reshape_text(text):
-    """Reshapes and reorders Arabic text for correct display."""
-    return get_display(reshape(text))
+    """Reshapes and reorders Arabic text for correct display (memoized)."""
+    return shape_text(text)
 
 
 def _log_status(message):
@@ -133,31 +316,15 @@ def _log_status(message):
     print(message)
 
 
-def _add_invoice_details(pdf, logo_path, company_name, invoice_id, date, due_date, client_name, client_contact, gray_color):
-    """Adds a refined RTL header with the company info below the logo."""
+def _show_error(message):
+    """Shows an error in the Streamlit page (imported here so batch workers never load Streamlit)."""
+    import streamlit as st
 
-    # Logo
-    logo_width = 45  # Adjust as needed
-    logo_x = 10
-    logo_y = 2
-    if logo_path:
-        try:
-            pdf.image(logo_path, x=logo_x, y=logo_y, w=logo_width)
-        except Exception as e:
-            print(f"Error adding logo: {e}")  # Or log the error
+    st.error(message)
 
-    # Company Information (Left-Aligned, below logo)
-    current_y = logo_y + logo_width / 2 + 18  # Start below the logo + some padding. Logo height assumed to be equal to width.
 
-    pdf.set_font("Amiri", "B", 18)
-    pdf.set_text_color(0)
-    pdf.set_xy(logo_x, current_y)  # Position below logo
-    pdf.cell(0, 10, _reshape_text(company_name), ln=1, align="L")
-
-    current_y += 10  # Add space between company name and next line
-    pdf.set_font("Amiri", "", 12)
-    pdf.set_xy(logo_x, current_y)
-    pdf.multi_cell(0, 8, _reshape_text("teleset DOGTAS LAZZONI MONTEL\nالهاتف: 0913273608"), align="L")
+def _add_invoice_details(pdf, invoice_id, date, due_date, client_name, client_contact, gray_color):
+    """Overlays the per-invoice RTL header fields: invoice metadata and client information."""
 
     # Invoice Metadata (Right-Aligned, below logo, like the company info)
     pdf.set_text_color(gray_color)
@@ -183,7 +350,7 @@ def _add_invoice_details(pdf, logo_path, company_name, invoice_id, date, due_dat
     current_y += 3  # Add some space between metadata and client info
 
     client_info = [
-        _reshape_text("الاخوة"),
+        CLIENT_HEADING,
         _reshape_text(client_name),
         _reshape_text(client_contact),
     ]
@@ -195,11 +362,6 @@ def _add_invoice_details(pdf, logo_path, company_name, invoice_id, date, due_dat
         pdf.cell(0, 8, line, ln=1, align="R")
         current_y += 8
 
-    # Divider Line (Adjust y-coordinate)
-    pdf.set_draw_color(200)
-    current_y += 5  # Add space above the line
-    pdf.line(10, current_y, pdf.w - 10, current_y)
-    pdf.ln(10)  # Space below the line
     pdf.set_text_color(0)
 
 
@@ -0,0 +1,113 @@
+"""Tokenized full-text search over mixed Arabic/Latin product text.
+
+Text is normalized before indexing and querying (see
+`utils.text_normalization`) and then split into word tokens. The index maps
+every token to the rows containing it. Query tokens match whole tokens or
+prefixes, so "كرس" finds "كرسي" and "sof" finds "Sofa". Lookups bisect a
+sorted token list instead of scanning every row.
+
+Columns such as product codes can also be matched anywhere inside a token
+("001" finds "F001"): every suffix of their tokens is indexed too, and a
+query token matching a suffix by prefix is a substring match.
+"""
+from bisect import bisect_left
+
+import numpy as np
+
+from utils.text_normalization import tokenize
+
+# Scores of a query token matching a row token exactly, by prefix or inside a code
+EXACT_SCORE = 4
+PREFIX_SCORE = 2
+SUBSTRING_SCORE = 1
+
+
+class SearchIndex:
+    """Inverted index from normalized tokens to row positions."""
+
+    def __init__(self, documents, substring_documents=()):
+        """Indexes `documents`, one per row, and `substring_documents` (one per row, if any) for substring matches."""
+        postings, self.n_rows = _postings(documents)
+        self._tokens = sorted(postings)
+        self._postings = [np.asarray(postings[token], dtype=np.int32) for token in self._tokens]
+
+        self._suffixes, self._suffix_postings = _suffix_postings(_postings(substring_documents)[0])
+
+    @classmethod
+    def from_frame(cls, df, columns, substring_columns=()):
+        """Indexes the given DataFrame columns, one document per row.
+
+        Tokens of `substring_columns` also match anywhere inside (see the
+        module docstring); list them in `columns` too for word matches.
+        """
+        return cls(_join_columns(df, columns), _join_columns(df, substring_columns))
+
+    def search(self, query, limit=None):
+        """Returns the positions of rows matching every query token, best matches first.
+
+        Rows score `EXACT_SCORE` per query token found as a whole token,
+        `PREFIX_SCORE` per token found only as a prefix and `SUBSTRING_SCORE`
+        per token found only inside a substring-indexed token; ties keep row
+        order.
+        """
+        query_tokens = tokenize(query)
+        if not query_tokens or not self.n_rows:
+            return []
+
+        scores = np.zeros(self.n_rows, dtype=np.int32)
+        matched = np.ones(self.n_rows, dtype=bool)
+        for query_token in dict.fromkeys(query_tokens):
+            token_scores = np.zeros(self.n_rows, dtype=np.int32)
+            for token, rows in _prefixed(self._suffixes, self._suffix_postings, query_token):
+                token_scores[rows] = SUBSTRING_SCORE
+            for token, rows in _prefixed(self._tokens, self._postings, query_token):
+                score = EXACT_SCORE if token == query_token else PREFIX_SCORE
+                token_scores[rows] = np.maximum(token_scores[rows], score)
+            matched &= token_scores > 0
+            scores += token_scores
+
+        rows = np.flatnonzero(matched)
+        ranked = rows[np.argsort(-scores[rows], kind="stable")]
+        return ranked[:limit].tolist() if limit else ranked.tolist()
+
+
+def _postings(documents):
+    """Returns a map of every token of `documents` to the rows containing it, and the row count."""
+    postings = {}
+    n_rows = 0
+    for row, document in enumerate(documents):
+        n_rows = row + 1
+        for token in set(tokenize(document)):
+            postings.setdefault(token, []).append(row)
+    return postings, n_rows
+
+
+def _suffix_postings(postings):
+    """Returns the sorted proper suffixes of the tokens of `postings`, and the rows containing each."""
+    suffixes = {}
+    for token, rows in postings.items():
+        for i in range(1, len(token)):
+            suffixes.setdefault(token[i:], []).append(rows)
+    names = sorted(suffixes)
+    # Rows of one token are already unique; a suffix shared by several tokens needs merging
+    return names, [
+        np.asarray(rows[0], dtype=np.int32) if len(rows) == 1 else np.unique(np.concatenate(rows)).astype(np.int32)
+        for rows in (suffixes[name] for name in names)
+    ]
+
+
+def _prefixed(tokens, postings, prefix):
+    """Yields the tokens of a sorted token list starting with `prefix`, with their rows."""
+    for i in range(bisect_left(tokens, prefix), len(tokens)):
+        if not tokens[i].startswith(prefix):
+            break
+        yield tokens[i], postings[i]
+
+
+def _join_columns(df, columns):
+    """Returns the text of the given DataFrame columns joined per row, or an empty list."""
+    columns = [col for col in columns if col in df.columns]
+    if not columns:
+        return []
+    text = [df[col].astype(str) for col in columns]
+    return text[0].str.cat(text[1:], sep=" ")
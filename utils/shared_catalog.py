@@ -0,0 +1,130 @@
+"""Process-wide, read-only stock catalogs shared between browser sessions.
+
+Every session used to keep its own copy of the stock DataFrame and of the
+indexes built over it. The registry here loads each distinct catalog file
+once per server process. Sessions hold a small `CatalogHandle` in their
+session state instead of a copy. Handles are reference counted and released
+when the session state is dropped, so a catalog that is no longer used and
+not published is freed.
+
+Publishing makes a catalog the current version, which is what sessions get
+when they have not uploaded a file of their own.
+"""
+import threading
+import weakref
+from datetime import datetime
+
+import streamlit as st
+
+from utils.catalog_store import load_catalog
+
+
+class SharedCatalog:
+    """One loaded catalog and the derived structures built over it, shared read-only."""
+
+    def __init__(self, digest, frame):
+        self.digest = digest
+        self.frame = frame
+        self.refs = 0
+        self._resources = {}
+        self._lock = threading.Lock()
+
+    def resource(self, name, build):
+        """Returns `build(frame)`, built once per catalog (e.g. the filter and search indexes)."""
+        with self._lock:
+            if name not in self._resources:
+                self._resources[name] = build(self.frame)
+            return self._resources[name]
+
+
+class CatalogHandle:
+    """A session's reference to a shared catalog; released on `release()` or garbage collection."""
+
+    def __init__(self, registry, catalog):
+        self.catalog = catalog
+        self._finalizer = weakref.finalize(self, registry.release, catalog.digest)
+
+    @property
+    def digest(self):
+        return self.catalog.digest
+
+    @property
+    def frame(self):
+        """The shared stock DataFrame. Callers must not modify it."""
+        return self.catalog.frame
+
+    def release(self):
+        """Drops this handle's reference; safe to call more than once."""
+        self._finalizer()
+
+
+class CatalogRegistry:
+    """Reference-counted catalogs keyed by content hash, plus the published versions."""
+
+    def __init__(self):
+        self._catalogs = {}  # content hash -> SharedCatalog
+        self._versions = []  # [{"version", "digest", "published_at"}], oldest first
+        # Reentrant: handles may be garbage collected, and so released, while the lock is held
+        self._lock = threading.RLock()
+
+    def open(self, path, digest, columns=None):
+        """Returns a handle to the catalog stored at `path`, loading it on first use."""
+        with self._lock:
+            catalog = self._catalogs.get(digest)
+            if catalog is None:
+                catalog = SharedCatalog(digest, load_catalog(path, columns))
+                self._catalogs[digest] = catalog
+            catalog.refs += 1
+            return CatalogHandle(self, catalog)
+
+    def release(self, digest):
+        """Drops one reference, freeing the catalog once unused and not the published version."""
+        with self._lock:
+            catalog = self._catalogs.get(digest)
+            if catalog is None:
+                return
+            catalog.refs -= 1
+            if catalog.refs <= 0 and digest != self._current_digest():
+                del self._catalogs[digest]
+
+    def publish(self, digest):
+        """Makes a loaded catalog the current version for every session and returns its number."""
+        with self._lock:
+            if digest not in self._catalogs:
+                raise KeyError(f"Catalog {digest[:12]} is not loaded.")
+            previous = self._current_digest()
+            version = len(self._versions) + 1
+            self._versions.append({"version": version, "digest": digest, "published_at": datetime.now()})
+            stale = self._catalogs.get(previous)
+            if previous != digest and stale is not None and stale.refs <= 0:
+                del self._catalogs[previous]
+            return version
+
+    def current(self):
+        """Returns a handle to the published catalog, or None if nothing was published."""
+        with self._lock:
+            digest = self._current_digest()
+            if digest is None:
+                return None
+            catalog = self._catalogs[digest]
+            catalog.refs += 1
+            return CatalogHandle(self, catalog)
+
+    def current_version(self):
+        """Returns the record of the published version, or None."""
+        with self._lock:
+            return dict(self._versions[-1]) if self._versions else None
+
+    def stats(self):
+        """Returns {content hash: reference count} of the loaded catalogs."""
+        with self._lock:
+            return {digest: catalog.refs for digest, catalog in self._catalogs.items()}
+
+    def _current_digest(self):
+        return self._versions[-1]["digest"] if self._versions else None
+
+
+@st.cache_resource
+def get_catalog_registry():
+    """Returns the catalog registry shared by every session of this server process."""
+    return CatalogRegistry()
@@ -0,0 +1,114 @@
+"""Inverted-index filter engine over a stock DataFrame.
+
+Each column is factorized once into integer codes. Low-cardinality columns
+(manufacturer, color, size, ...) also get one packed row bitmap per distinct
+value. A filter is then an OR of value bitmaps within a column, followed by
+an AND across columns. That is a few vectorized byte operations, instead of
+a `df.copy()` and a chain of `isin` scans on every rerun. The per-column masks
+are memoized, so changing one filter only recomputes that column.
+
+Values are compared as strings, matching the options shown in the widgets.
+"""
+import numpy as np
+import pandas as pd
+
+# Columns with more distinct values than this are filtered through their codes instead of bitmaps
+BITMAP_MAX_CARDINALITY = 256
+# Value used by the filter widgets to mean "no filter on this column"
+ALL = "All"
+# Number of memoized per-column masks
+MASK_CACHE_SIZE = 256
+
+
+class StockIndex:
+    """Per-column value -> row-bitmap index with cross-filtered facet counts."""
+
+    def __init__(self, df, columns=None):
+        self.n_rows = len(df)
+        self.columns = list(columns if columns is not None else df.columns)
+        self._values = {}  # col -> sorted list of distinct string values
+        self._codes = {}  # col -> int32 code per row
+        self._positions = {}  # col -> {value: code}
+        self._bitmaps = {}  # col -> (n_values, ceil(n_rows / 8)) packed bitmaps
+        self._mask_cache = {}
+
+        for col in self.columns:
+            codes, uniques = pd.factorize(df[col].astype(str), sort=True)
+            codes = codes.astype(np.int32)
+            values = [str(value) for value in uniques]
+            self._values[col] = values
+            self._codes[col] = codes
+            self._positions[col] = {value: i for i, value in enumerate(values)}
+            if len(values) <= BITMAP_MAX_CARDINALITY:
+                self._bitmaps[col] = np.packbits(codes[None, :] == np.arange(len(values), dtype=np.int32)[:, None], axis=1)
+
+    def values(self, col):
+        """Returns the sorted distinct values of a column, as strings."""
+        return self._values[col]
+
+    def mask(self, filters):
+        """Returns a boolean row mask for `filters` ({column: selected values})."""
+        packed = self._combine(self._active_masks(filters))
+        if packed is None:
+            return np.ones(self.n_rows, dtype=bool)
+        return np.unpackbits(packed, count=self.n_rows).astype(bool)
+
+    def filter(self, df, filters):
+        """Returns the rows of `df` (the indexed frame) matching `filters`."""
+        packed = self._combine(self._active_masks(filters))
+        if packed is None:
+            return df
+        return df.iloc[np.flatnonzero(np.unpackbits(packed, count=self.n_rows))]
+
+    def facet_counts(self, filters):
+        """Returns {column: {value: matching rows}} with every filter applied except the column's own.
+
+        These are the counts a user would get by changing only that column's
+        selection, as shown next to each widget option.
+        """
+        active = self._active_masks(filters)
+        counts = {}
+        for col in self.columns:
+            others = self._combine([mask for other, mask in active.items() if other != col])
+            codes = self._codes[col]
+            if others is not None:
+                codes = codes[np.unpackbits(others, count=self.n_rows).astype(bool)]
+            col_counts = np.bincount(codes, minlength=len(self._values[col]))
+            counts[col] = dict(zip(self._values[col], col_counts.tolist()))
+        return counts
+
+    def _active_masks(self, filters):
+        """Returns the packed mask of every column that is actually filtered."""
+        return {
+            col: self._column_mask(col, tuple(selected))
+            for col, selected in filters.items()
+            if col in self._codes and ALL not in selected
+        }
+
+    def _column_mask(self, col, selected):
+        """Returns the packed row mask of one column's selection (memoized)."""
+        key = (col, frozenset(selected))
+        packed = self._mask_cache.get(key)
+        if packed is not None:
+            return packed
+
+        positions = [self._positions[col][value] for value in selected if value in self._positions[col]]
+        if not positions:
+            packed = np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+        elif col in self._bitmaps:
+            packed = np.bitwise_or.reduce(self._bitmaps[col][positions], axis=0)
+        else:
+            packed = np.packbits(np.isin(self._codes[col], positions))
+
+        if len(self._mask_cache) >= MASK_CACHE_SIZE:
+            self._mask_cache.clear()
+        self._mask_cache[key] = packed
+        return packed
+
+    @staticmethod
+    def _combine(masks):
+        """ANDs packed masks together; None means no filter at all."""
+        masks = list(masks.values()) if isinstance(masks, dict) else list(masks)
+        if not masks:
+            return None
+        return np.bitwise_and.reduce(masks, axis=0) if len(masks) > 1 else masks[0]
@@ -0,0 +1,124 @@
+"""Vectorized validation of uploaded stock data.
+
+Every check is a boolean column operation over the whole frame, so all
+problems are collected in one pass. The result is a compact report of counts
+and a few sample row numbers per problem, instead of a DataFrame dump per
+column.
+"""
+import numpy as np
+import pandas as pd
+
+# Columns that must be present in a stock file
+REQUIRED_COLUMNS = ['description', 'price']
+# Columns coerced to numbers
+NUMERIC_COLUMNS = ['quantity', 'price']
+# Number of offending row numbers kept per problem
+SAMPLE_ROWS = 5
+# Columns left out of the unique-value cache
+UNIQUE_VALUES_EXCLUDED = {'description'}
+
+
+def validate_stock_frame(df, start_row=0):
+    """Coerces numeric columns and checks every row of a stock DataFrame at once.
+
+    Args:
+        df (pd.DataFrame): The parsed stock data. Numeric columns are converted in place.
+        start_row (int): Position of the frame's first row in the file, for chunked reads.
+
+    Returns:
+        dict: {"rows": row count, "missing_columns": [...], "problems": [...]}
+            where each problem is {"column", "check", "count", "sample_rows"}.
+            Sample rows are 0-based positions in the file's data rows.
+    """
+    checks = {}
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            raw = df[col]
+            values = pd.to_numeric(raw, errors='coerce')
+            df[col] = values
+            missing = raw.isna().to_numpy()
+            checks[(col, "missing")] = missing
+            checks[(col, "not a number")] = values.isna().to_numpy() & ~missing
+            checks[(col, "negative")] = (values < 0).to_numpy()
+    if 'description' in df.columns:
+        text = df['description'].astype("string").str.strip()
+        checks[('description', "empty")] = text.isna().to_numpy() | (text == "").to_numpy(dtype=bool, na_value=False)
+
+    problems = []
+    for (col, check), mask in checks.items():
+        count = int(np.count_nonzero(mask))
+        if count:
+            problems.append({
+                "column": col,
+                "check": check,
+                "count": count,
+                "sample_rows": (np.flatnonzero(mask)[:SAMPLE_ROWS] + start_row).tolist(),
+            })
+    return {
+        "rows": len(df),
+        "missing_columns": [col for col in REQUIRED_COLUMNS if col not in df.columns],
+        "problems": problems,
+    }
+
+
+def merge_validation_reports(reports):
+    """Combines the reports of consecutive chunks into one report for the whole file."""
+    merged = {"rows": 0, "missing_columns": [], "problems": []}
+    problems = {}
+    for report in reports:
+        merged["rows"] += report["rows"]
+        for col in report["missing_columns"]:
+            if col not in merged["missing_columns"]:
+                merged["missing_columns"].append(col)
+        for problem in report["problems"]:
+            key = (problem["column"], problem["check"])
+            if key not in problems:
+                problems[key] = dict(problem, sample_rows=list(problem["sample_rows"]))
+                merged["problems"].append(problems[key])
+            else:
+                total = problems[key]
+                total["count"] += problem["count"]
+                total["sample_rows"] = (total["sample_rows"] + problem["sample_rows"])[:SAMPLE_ROWS]
+    return merged
+
+
+def format_validation_report(report):
+    """Returns the report's problems as one short Markdown message, or None when there are none."""
+    if not report["problems"]:
+        return None
+    lines = [f"Data problems found in the uploaded file ({report['rows']} rows checked):"]
+    for problem in report["problems"]:
+        samples = ", ".join(str(row) for row in problem["sample_rows"])
+        more = ", ..." if problem["count"] > len(problem["sample_rows"]) else ""
+        lines.append(f"- '{problem['column']}' {problem['check']}: {problem['count']} rows (e.g. rows {samples}{more})")
+    return "\n".join(lines)
+
+
+def build_unique_values(df):
+    """Returns {column: sorted distinct non-null values} for the filter widgets.
+
+    Numeric and datetime columns are sorted natively. Mixed object columns put
+    non-text values first and text last, as the old `(isinstance(x, str), x)`
+    fallback did, but sort each group as an array.
+    """
+    return {col: sorted_unique(df[col]) for col in df.columns if col not in UNIQUE_VALUES_EXCLUDED}
+
+
+def sorted_unique(series):
+    """Returns the sorted distinct non-null values of a Series as a list."""
+    values = series.dropna()
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype(values.cat.categories.dtype)
+    if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_datetime64_any_dtype(values):
+        return np.sort(np.asarray(values.unique())).tolist()
+
+    uniques = pd.Series(values.unique(), dtype=object)
+    is_text = uniques.map(type).eq(str).to_numpy()
+    text = np.sort(uniques[is_text].to_numpy(dtype=str)).tolist()
+    others = uniques[~is_text]
+    try:
+        order = np.argsort(pd.to_numeric(others).to_numpy(), kind="stable")
+        others = others.to_numpy()[order].tolist()
+    except (ValueError, TypeError):
+        others = sorted(others, key=str)
+    return others + text
@@ -0,0 +1,28 @@
+"""Arabic/Latin text normalization shared by the product search and the client lookup.
+
+Text is normalized before it is indexed or compared:
+- Arabic diacritics and tatweel are stripped.
+- Alef/yeh/teh-marbuta variants are folded.
+- Arabic-Indic digits become ASCII digits.
+- Latin text is case-folded.
+"""
+import re
+
+_DIACRITICS = re.compile("[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]")  # Harakat, Quranic marks, tatweel
+_TOKEN = re.compile(r"\w+")
+_FOLD = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ى": "ي", "ئ": "ي", "ؤ": "و", "ة": "ه",
+    **{chr(0x0660 + d): str(d) for d in range(10)},  # Arabic-Indic digits
+    **{chr(0x06F0 + d): str(d) for d in range(10)},  # Eastern Arabic-Indic digits
+})
+
+
+def normalize(text):
+    """Normalizes Arabic/Latin text for matching."""
+    return _DIACRITICS.sub("", str(text)).translate(_FOLD).casefold()
+
+
+def tokenize(text):
+    """Splits normalized text into word tokens."""
+    return _TOKEN.findall(normalize(text))